@@ -0,0 +1,211 @@
+# app/admission.py
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from fastapi import Request
+from app.config import Config, logger
+from app.metrics import admission_queue_depth, admission_in_flight, admission_shed, admission_wait_time
+
+
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+class AdmissionRejected(Exception):
+    """Request shed before reaching the orchestrator; rendered as 429/503 with Retry-After, or 413 without"""
+    def __init__(self, status_code: int, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = None if retry_after is None else max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float]):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def try_acquire(self, cost: float = 1.0) -> float:
+        """Take cost tokens and return 0, or return the seconds until they would be available"""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Bounded concurrency with per-client rate limits and priority queues that shed on expected delay"""
+    def __init__(self, max_concurrency: int, max_wait_seconds: Dict[Priority, float], rate_per_second: float,
+                 burst: float, initial_service_seconds: float = 2.0, max_clients: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.max_wait_seconds = max_wait_seconds
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        # EWMA of time a request holds a slot, used to predict queueing delay
+        self.service_seconds = initial_service_seconds
+        self._active = 0
+        self._queues = {priority: deque() for priority in Priority}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str, priority: Priority = Priority.INTERACTIVE, cost: float = 1.0):
+        """Hold one of max_concurrency slots for the body, or raise AdmissionRejected; cost 0 skips the rate limit"""
+        if cost:
+            self._check_rate(client_id, priority, cost)
+        await self._acquire(priority)
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * (self.clock() - started)
+            self._release()
+
+    async def run_all(self, client_id: str, priority: Priority,
+                      calls: List[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """Charge len(calls) tokens once, then run each call in its own slot; if one fails the rest are cancelled"""
+        size = len(calls)
+        if size > self.burst:
+            self._shed(priority, "too_large")
+            raise AdmissionRejected(413, f"Batch of {size} exceeds the per-client burst of {self.burst:g}")
+        # the batch's own items queue behind each other; reject up front if the last one could never start in time
+        free = 0 if any(self._queues.values()) else max(0, self.max_concurrency - self._active)
+        queued = size - free
+        if queued > 0:
+            alone = (size - self.max_concurrency) * self.service_seconds / self.max_concurrency
+            if alone > self.max_wait_seconds[priority]:
+                self._shed(priority, "too_large")
+                raise AdmissionRejected(413, f"Batch of {size} cannot start within the queueing budget")
+        self._check_rate(client_id, priority, size)
+        if queued > 0:
+            expected = self._expected_wait(priority, queued - 1)
+            if expected > self.max_wait_seconds[priority]:
+                self._shed(priority, "queue_full")
+                raise AdmissionRejected(503, "Server overloaded", expected)
+
+        async def run(call):
+            async with self.slot(client_id, priority, cost=0):
+                return await call()
+
+        tasks = [asyncio.ensure_future(run(call)) for call in calls]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def _check_rate(self, client_id: str, priority: Priority, cost: float):
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst, self.clock)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client_id)
+        retry_after = bucket.try_acquire(cost)
+        if retry_after:
+            self._shed(priority, "rate_limited")
+            raise AdmissionRejected(429, "Rate limit exceeded", retry_after)
+
+    def _expected_wait(self, priority: Priority, extra: int = 0) -> float:
+        """Predicted queueing delay for a request joining now, with extra requests of its own ahead of it"""
+        ahead = len(self._queues[Priority.INTERACTIVE]) + extra
+        if priority == Priority.BATCH:
+            ahead += len(self._queues[Priority.BATCH])
+        return (ahead + 1) * self.service_seconds / self.max_concurrency
+
+    async def _acquire(self, priority: Priority):
+        queued = any(self._queues.values())
+        if self._active < self.max_concurrency and not queued:
+            self._active += 1
+            admission_in_flight.inc()
+            admission_wait_time.labels(priority=priority.value).observe(0)
+            return
+
+        budget = self.max_wait_seconds[priority]
+        expected = self._expected_wait(priority)
+        if expected > budget:
+            self._shed(priority, "queue_full")
+            raise AdmissionRejected(503, "Server overloaded", expected)
+
+        queue = self._queues[priority]
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        admission_queue_depth.labels(priority=priority.value).inc()
+        started = self.clock()
+        try:
+            # unlike wait_for on Python 3.11, wait never swallows a cancellation that races the hand-over
+            done, _ = await asyncio.wait((waiter,), timeout=budget)
+        except asyncio.CancelledError:
+            self._abandon(waiter, priority)
+            raise
+        if not done:
+            self._abandon(waiter, priority)
+            self._shed(priority, "queue_timeout")
+            raise AdmissionRejected(503, "Queueing delay exceeded budget", self._expected_wait(priority))
+        admission_wait_time.labels(priority=priority.value).observe(self.clock() - started)
+
+    def _abandon(self, waiter: asyncio.Future, priority: Priority):
+        if waiter.done():
+            # the slot was handed over just as the wait ended; give it back
+            self._release()
+        else:
+            waiter.cancel()
+            self._queues[priority].remove(waiter)
+            admission_queue_depth.labels(priority=priority.value).dec()
+
+    def _release(self):
+        # hand the slot straight to the next waiter, interactive first
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue:
+                waiter = queue.popleft()
+                admission_queue_depth.labels(priority=priority.value).dec()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+        admission_in_flight.dec()
+
+    def _shed(self, priority: Priority, reason: str):
+        admission_shed.labels(priority=priority.value, reason=reason).inc()
+        logger.warning(f"Shed {priority.value} request: {reason}")
+
+
+def client_id(request: Request) -> str:
+    """Rate-limit key: X-Client-Id when sent, otherwise the peer address"""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+
+def request_priority(request: Request, default: Priority) -> Priority:
+    """X-Priority: batch lets interactive endpoints be called at batch priority, never the reverse"""
+    if default == Priority.INTERACTIVE and request.headers.get("x-priority", "").lower() == Priority.BATCH.value:
+        return Priority.BATCH
+    return default
+
+
+admission = AdmissionController(
+    max_concurrency=Config.ADMISSION_MAX_CONCURRENCY,
+    max_wait_seconds={
+        Priority.INTERACTIVE: Config.ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS,
+        Priority.BATCH: Config.ADMISSION_BATCH_MAX_WAIT_SECONDS,
+    },
+    rate_per_second=Config.ADMISSION_RATE_PER_SECOND,
+    burst=Config.ADMISSION_BURST,
+    initial_service_seconds=Config.ADMISSION_INITIAL_SERVICE_SECONDS,
+)
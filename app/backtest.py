@@ -0,0 +1,200 @@
+# app/backtest.py
+"""Replay stored assessments under a candidate scoring configuration.
+
+    python -m app.backtest --store data/assessments.jsonl --candidate candidate.json --workers 4
+
+The candidate file is a ScoringConfig as JSON, for example
+{"weights": {"credit": 0.4, "market": 0.2, "operational": 0.2, "compliance": 0.2}}.
+Records are re-scored from their stored request inputs, both under the baseline (the live
+configuration unless --baseline is given) and under the candidate. Comparing two rule-only scores
+keeps LLM adjustments in the stored scores out of the deltas. Only .jsonl/.msgpack stores are
+streamed; a .json snapshot store is refused unless --allow-snapshot is given.
+"""
+import argparse
+import itertools
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+import orjson
+from app.config import Config
+from app.models import ScoringConfig
+from app.scoring import RISK_RULES, RISK_TYPES, LEVELS, score_rules, risk_level, overall_score
+from app.serialization import storage_format, iter_records
+
+SCOPES = RISK_TYPES + ("overall",)
+LEVEL_INDEX = {level: i for i, level in enumerate(LEVELS)}
+# Score deltas fall in [-1, 1]; percentiles are read off this histogram so workers never hold raw deltas
+DELTA_BINS = np.linspace(-1.0, 1.0, 401)
+BATCH_SIZE = 500
+
+
+def iter_stored_assessments(path: str, allow_snapshot: bool = False) -> Iterator[Dict[str, Any]]:
+    """Stored records one at a time; a .json snapshot store is only read (whole) when allow_snapshot is set"""
+    if storage_format(path) == "json":
+        if not allow_snapshot:
+            raise ValueError(f"{path} is a snapshot store and would be loaded into memory whole; convert it "
+                             f"with app.serialization.convert_snapshot or pass --allow-snapshot")
+        with open(path, "rb") as f:
+            yield from orjson.loads(f.read()).get("assessments", {}).values()
+    else:
+        yield from iter_records(path)
+
+
+def rescore(request: Dict[str, Any], config: ScoringConfig) -> Dict[str, float]:
+    """Rule-only per-type and overall scores of a stored request under config"""
+    rules = {**RISK_RULES, **(config.rules or {})}
+    scores = {
+        risk_type: score_rules(rules[risk_type], request["financial_data"], request.get("market_data"),
+                               request.get("compliance_requirements") or [])[0]
+        for risk_type in RISK_TYPES
+    }
+    scores["overall"] = overall_score(scores, config.weights or Config.RISK_WEIGHTS)
+    return scores
+
+
+def _empty_partial() -> Dict[str, Any]:
+    return {
+        "records": 0,
+        "skipped": 0,
+        "migration": {scope: np.zeros((len(LEVELS), len(LEVELS)), dtype=np.int64) for scope in SCOPES},
+        "delta_sum": dict.fromkeys(SCOPES, 0.0),
+        "delta_sumsq": dict.fromkeys(SCOPES, 0.0),
+        "delta_min": dict.fromkeys(SCOPES, np.inf),
+        "delta_max": dict.fromkeys(SCOPES, -np.inf),
+        "delta_hist": {scope: np.zeros(len(DELTA_BINS) - 1, dtype=np.int64) for scope in SCOPES},
+    }
+
+
+def score_batch(records: List[Dict[str, Any]], baseline: ScoringConfig, candidate: ScoringConfig) -> Dict[str, Any]:
+    """Aggregate migrations and deltas for one batch; runs in a worker process"""
+    partial = _empty_partial()
+    base_thresholds = baseline.thresholds or Config.RISK_THRESHOLDS
+    cand_thresholds = candidate.thresholds or Config.RISK_THRESHOLDS
+    deltas = {scope: [] for scope in SCOPES}
+    for record in records:
+        request = record.get("request")
+        if not request:
+            partial["skipped"] += 1
+            continue
+        before = rescore(request, baseline)
+        after = rescore(request, candidate)
+        for scope in SCOPES:
+            partial["migration"][scope][LEVEL_INDEX[risk_level(before[scope], base_thresholds)],
+                                        LEVEL_INDEX[risk_level(after[scope], cand_thresholds)]] += 1
+            deltas[scope].append(after[scope] - before[scope])
+        partial["records"] += 1
+
+    for scope, values in deltas.items():
+        if values:
+            values = np.asarray(values)
+            partial["delta_sum"][scope] = float(values.sum())
+            partial["delta_sumsq"][scope] = float((values ** 2).sum())
+            partial["delta_min"][scope] = float(values.min())
+            partial["delta_max"][scope] = float(values.max())
+            partial["delta_hist"][scope] = np.histogram(np.clip(values, -1.0, 1.0), bins=DELTA_BINS)[0]
+    return partial
+
+
+def _merge(total: Dict[str, Any], partial: Dict[str, Any]):
+    total["records"] += partial["records"]
+    total["skipped"] += partial["skipped"]
+    for scope in SCOPES:
+        total["migration"][scope] += partial["migration"][scope]
+        total["delta_sum"][scope] += partial["delta_sum"][scope]
+        total["delta_sumsq"][scope] += partial["delta_sumsq"][scope]
+        total["delta_min"][scope] = min(total["delta_min"][scope], partial["delta_min"][scope])
+        total["delta_max"][scope] = max(total["delta_max"][scope], partial["delta_max"][scope])
+        total["delta_hist"][scope] += partial["delta_hist"][scope]
+
+
+def _histogram_percentile(hist: np.ndarray, q: float) -> float:
+    cumulative = np.cumsum(hist)
+    index = int(np.searchsorted(cumulative, q / 100 * cumulative[-1]))
+    return float((DELTA_BINS[index] + DELTA_BINS[index + 1]) / 2)
+
+
+def _report(total: Dict[str, Any]) -> Dict[str, Any]:
+    n = total["records"]
+    report = {"records": n, "skipped": total["skipped"], "migration": {}, "score_delta": {}}
+    for scope in SCOPES:
+        matrix = total["migration"][scope]
+        report["migration"][scope] = {
+            LEVELS[i].value: {LEVELS[j].value: int(matrix[i, j]) for j in range(len(LEVELS))}
+            for i in range(len(LEVELS))
+        }
+        if n:
+            mean = total["delta_sum"][scope] / n
+            variance = max(0.0, total["delta_sumsq"][scope] / n - mean ** 2)
+            hist = total["delta_hist"][scope]
+            report["score_delta"][scope] = {
+                "mean": mean,
+                "std": variance ** 0.5,
+                "min": total["delta_min"][scope],
+                "max": total["delta_max"][scope],
+                **{f"p{q}": _histogram_percentile(hist, q) for q in (5, 50, 95)},
+                "changed_level": int(n - np.trace(matrix)),
+            }
+    return report
+
+
+def _batches(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def run_backtest(records: Iterable[Dict[str, Any]], candidate: ScoringConfig,
+                 baseline: Optional[ScoringConfig] = None, workers: int = 1,
+                 batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Level migration matrices and score-delta statistics from baseline to candidate scoring"""
+    baseline = baseline or ScoringConfig()
+    total = _empty_partial()
+    if workers <= 1:
+        for batch in _batches(records, batch_size):
+            _merge(total, score_batch(batch, baseline, candidate))
+        return _report(total)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # a bounded window of in-flight batches keeps memory flat however large the store is
+        in_flight = deque()
+        for batch in _batches(records, batch_size):
+            in_flight.append(pool.submit(score_batch, batch, baseline, candidate))
+            if len(in_flight) >= 2 * workers:
+                _merge(total, in_flight.popleft().result())
+        while in_flight:
+            _merge(total, in_flight.popleft().result())
+    return _report(total)
+
+
+def _load_config(path: Optional[str]) -> Optional[ScoringConfig]:
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return ScoringConfig.model_validate(orjson.loads(f.read()))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backtest a scoring configuration over stored assessments")
+    parser.add_argument("--store", default=Config.ASSESSMENT_STORE_PATH, help="assessment store to replay")
+    parser.add_argument("--candidate", required=True, help="ScoringConfig JSON to evaluate")
+    parser.add_argument("--baseline", help="ScoringConfig JSON to compare against (default: live config)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="records per worker task")
+    parser.add_argument("--allow-snapshot", action="store_true",
+                        help="replay a .json snapshot store even though it is loaded into memory whole")
+    args = parser.parse_args(argv)
+
+    if storage_format(args.store) == "json":
+        if not args.allow_snapshot:
+            parser.error(f"{args.store} is a .json snapshot store and cannot be streamed; convert it to .jsonl "
+                         f"(see README, Backtesting Scoring Changes) or pass --allow-snapshot")
+        print(f"warning: loading all of {args.store} into memory", file=sys.stderr)
+    report = run_backtest(iter_stored_assessments(args.store, args.allow_snapshot), _load_config(args.candidate),
+                          _load_config(args.baseline), workers=args.workers, batch_size=args.batch_size)
+    sys.stdout.buffer.write(orjson.dumps(report, option=orjson.OPT_INDENT_2) + b"\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,49 @@ class Config:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your-api-key")
     VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "./vector_store")
     PROMETHEUS_PORT = int(os.getenv("PROMETHEUS_PORT", "8000"))
+    # Set (and wiped by the launcher) when running several uvicorn/gunicorn workers
+    PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
     API_PORT = int(os.getenv("API_PORT", "8080"))
+    # .json rewrites a full snapshot per write; .jsonl or .msgpack append one record per assessment
+    ASSESSMENT_STORE_PATH = os.getenv("ASSESSMENT_STORE_PATH", "data/assessments.json")
     HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+    # LLM latency guard: per-request budget, optional hedge delay and circuit breaker thresholds
+    LLM_LATENCY_BUDGET_SECONDS = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "8"))
+    LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS")) if os.getenv("LLM_HEDGE_AFTER_SECONDS") else None
+    LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "16"))
+    LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "50"))
+    LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+    LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+    LLM_BREAKER_P95_SECONDS = float(os.getenv("LLM_BREAKER_P95_SECONDS", "6"))
+    LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+    LLM_BREAKER_HALF_OPEN_PROBES = int(os.getenv("LLM_BREAKER_HALF_OPEN_PROBES", "3"))
+    # Admission control in front of the orchestrator; rate limits are per client
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+    ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_INTERACTIVE_MAX_WAIT_SECONDS", "2"))
+    ADMISSION_BATCH_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_BATCH_MAX_WAIT_SECONDS", "30"))
+    ADMISSION_RATE_PER_SECOND = float(os.getenv("ADMISSION_RATE_PER_SECOND", "5"))
+    ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "20"))
+    # Larger batches are rejected with 422; a batch is charged its full size, so keep this <= ADMISSION_BURST
+    MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", str(int(ADMISSION_BURST))))
+    ADMISSION_INITIAL_SERVICE_SECONDS = float(os.getenv("ADMISSION_INITIAL_SERVICE_SECONDS", "2"))
+    # Use documents without a company_id (e.g. sector reports) when a company has none of its own
+    RAG_FALLBACK_UNTAGGED = os.getenv("RAG_FALLBACK_UNTAGGED", "true").lower() == "true"
+    # Drop exact and near-duplicate chunks (MinHash Jaccard >= threshold) before embedding
+    RAG_DEDUP_ENABLED = os.getenv("RAG_DEDUP_ENABLED", "true").lower() == "true"
+    RAG_NEAR_DUP_THRESHOLD = float(os.getenv("RAG_NEAR_DUP_THRESHOLD", "0.85"))
+    # Query results closer than this cosine similarity to a better-ranked result are skipped; 1 disables
+    RAG_RESULT_SIMILARITY_CUTOFF = float(os.getenv("RAG_RESULT_SIMILARITY_CUTOFF", "0.95"))
+    RAG_RESULT_FETCH_FACTOR = int(os.getenv("RAG_RESULT_FETCH_FACTOR", "3"))
+    # Admin-only profiling and memory endpoints under /admin/diagnostics; not mounted unless enabled
+    DIAGNOSTICS_ENABLED = os.getenv("DIAGNOSTICS_ENABLED", "false").lower() == "true"
+    DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN", "")
     MAX_ITERATIONS = 10
+    RISK_WEIGHTS = {
+        "credit": 0.3,
+        "market": 0.25,
+        "operational": 0.2,
+        "compliance": 0.25
+    }
     RISK_THRESHOLDS = {
         "low": 0.3,
         "medium": 0.6,
@@ -0,0 +1,109 @@
+# app/dedup.py
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a bucket, then get verified
+LSH_BANDS = 16
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """Stable 32-bit hashes of the word n-grams of text"""
+    words = normalize(text).split(" ")
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter({zlib.crc32(g.encode("utf-8")) for g in grams}, dtype=np.uint64)
+
+
+class NearDuplicateIndex:
+    """Exact-hash plus MinHash/LSH index answering "have we already seen (almost) this text?".
+
+    Each entry carries an item (e.g. a FAISS id) and a partition. Exact matches are found in any
+    partition, since the text is identical; near matches only within the same partition.
+    """
+    def __init__(self, threshold: float = 0.85, num_perm: int = NUM_PERM, bands: int = LSH_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._exact: Dict[str, Any] = {}
+        self._signatures: List[np.ndarray] = []
+        self._items: List[Any] = []
+        self._buckets: List[Dict[Tuple[Hashable, bytes], List[int]]] = [defaultdict(list) for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text)
+        # (a*x + b) mod p fits in uint64 because a, b and x are all below 2**32
+        permuted = ((np.outer(hashes, self._a) + self._b) % _PRIME) & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def find(self, text: str, partition: Hashable = None, digest: Optional[str] = None,
+             signature: Optional[np.ndarray] = None) -> Optional[Tuple[str, Any]]:
+        """('exact' | 'near', item of the earlier entry) if text duplicates one already added, else None"""
+        digest = digest or content_hash(text)
+        if digest in self._exact:
+            return "exact", self._exact[digest]
+        signature = self.signature(text) if signature is None else signature
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get((partition, key), ()))
+        for candidate in sorted(candidates):
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                return "near", self._items[candidate]
+        return None
+
+    def add(self, text: str, item: Any = None, partition: Hashable = None) -> Optional[Tuple[str, Any]]:
+        """Add text unless it is a duplicate; returns the match as find() does"""
+        digest = content_hash(text)
+        signature = self.signature(text)
+        match = self.find(text, partition, digest, signature)
+        if match is None:
+            position = len(self._signatures)
+            self._exact[digest] = item
+            self._signatures.append(signature)
+            self._items.append(item)
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band][(partition, key)].append(position)
+        return match
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+
+def drop_similar(vectors: np.ndarray, k: int, cutoff: float) -> List[int]:
+    """Greedy pass over ranked vectors keeping up to k whose cosine similarity to every kept one is below cutoff"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    kept: List[int] = []
+    for i in range(len(unit)):
+        if not kept or np.max(unit[kept] @ unit[i]) < cutoff:
+            kept.append(i)
+            if len(kept) == k:
+                break
+    return kept
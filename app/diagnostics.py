@@ -0,0 +1,215 @@
+# app/diagnostics.py
+import gc
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.config import Config, logger
+
+MAX_PROFILE_SECONDS = 60
+# Frames from these files are bookkeeping of the tool itself, not allocation sites worth reporting
+_TRACEMALLOC_IGNORED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>")
+
+Stack = Tuple[Tuple[str, str, int], ...]
+
+
+def sample_stacks(seconds: float, interval: float) -> Tuple[Counter, int]:
+    """Sample every other thread's stack each interval; returns root-first stack counts and the sample count"""
+    own = threading.get_ident()
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            stacks[tuple(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+
+def _frame_name(name: str, filename: str) -> str:
+    return f"{name} ({os.path.basename(filename)})"
+
+
+def collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's folded format, one "a;b;c count" line per distinct stack"""
+    return "\n".join(";".join(_frame_name(name, filename) for name, filename, _ in stack) + f" {count}"
+                     for stack, count in stacks.most_common()) + "\n"
+
+
+def speedscope(stacks: Counter, interval: float, name: str = "risk-assessment-api") -> Dict[str, Any]:
+    """Sampled profile in the speedscope file format (https://www.speedscope.app)"""
+    frames, frame_ids = [], {}
+    samples, weights = [], []
+    for stack, count in stacks.most_common():
+        indices = []
+        for func, filename, _ in stack:
+            key = (func, filename)
+            if key not in frame_ids:
+                frame_ids[key] = len(frames)
+                frames.append({"name": func, "file": filename})
+            indices.append(frame_ids[key])
+        samples.append(indices)
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "risk-assessment-api diagnostics",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": name, "unit": "seconds",
+            "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+        }],
+    }
+
+
+def _allocation_stats(stats, limit: int):
+    return [{
+        "site": str(stat.traceback),
+        "size_kib": round(stat.size / 1024, 1),
+        "count": stat.count,
+        **({"size_diff_kib": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+           if hasattr(stat, "size_diff") else {}),
+    } for stat in stats[:limit]]
+
+
+class AllocationTracker:
+    """tracemalloc lifecycle plus the snapshot later snapshots are diffed against"""
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self.baseline = None
+            logger.info(f"tracemalloc started with {frames} frames per allocation")
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="tracemalloc is not running; POST .../tracemalloc/start first")
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _TRACEMALLOC_IGNORED])
+
+    def snapshot(self, key_type: str, limit: int) -> Dict[str, Any]:
+        """Top allocation sites now; the snapshot becomes the baseline for diff()"""
+        snapshot = self._snapshot()
+        self.baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {"traced_kib": round(current / 1024, 1), "peak_kib": round(peak / 1024, 1),
+                "top": _allocation_stats(snapshot.statistics(key_type), limit)}
+
+    def diff(self, key_type: str, limit: int) -> Dict[str, Any]:
+        """Allocation sites that grew the most since the baseline snapshot"""
+        if self.baseline is None:
+            raise HTTPException(status_code=409, detail="No baseline snapshot; GET .../tracemalloc/snapshot first")
+        return {"top": _allocation_stats(self._snapshot().compare_to(self.baseline, key_type), limit)}
+
+
+def memory_saver_counts(memory) -> Dict[str, int]:
+    storage = getattr(memory, "storage", {})
+    return {
+        "threads": len(storage),
+        "checkpoints": sum(len(checkpoints) for namespaces in storage.values() for checkpoints in namespaces.values()),
+        "pending_writes": sum(len(writes) for writes in getattr(memory, "writes", {}).values()),
+        "blobs": len(getattr(memory, "blobs", {})),
+    }
+
+
+def object_counts(orchestrator=None, mcp_server=None, rag_pipeline=None, top_types: int = 25) -> Dict[str, Any]:
+    """Sizes of the long-lived in-memory structures, plus the most common live object types"""
+    counts: Dict[str, Any] = {}
+    if orchestrator is not None:
+        counts["orchestrator_memory"] = memory_saver_counts(orchestrator.memory)
+    if mcp_server is not None:
+        counts["mcp_server"] = {
+            "assessments": len(mcp_server.assessments),
+            "companies": len(mcp_server.company_map),
+            "company_map_entries": sum(len(ids) for ids in mcp_server.company_map.values()),
+        }
+    if rag_pipeline is not None:
+        vector_store = rag_pipeline.vector_store
+        counts["rag_pipeline"] = {
+            "vectors": vector_store.index.ntotal if vector_store is not None else 0,
+            "metadata_postings": len(rag_pipeline.metadata_index),
+            "dedup_signatures": len(rag_pipeline.dedup_index) if rag_pipeline.dedup_index is not None else 0,
+        }
+    objects = gc.get_objects()
+    counts["gc"] = {
+        "tracked_objects": len(objects),
+        "generation_counts": list(gc.get_count()),
+        "top_types": dict(Counter(type(o).__name__ for o in objects).most_common(top_types)),
+    }
+    return counts
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if not Config.DIAGNOSTICS_TOKEN or not x_admin_token or \
+            not hmac.compare_digest(x_admin_token, Config.DIAGNOSTICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def create_router(orchestrator=None, mcp_server=None, rag_pipeline=None) -> APIRouter:
+    """Admin-only /admin/diagnostics routes; main.py only mounts them when DIAGNOSTICS_ENABLED"""
+    router = APIRouter(prefix="/admin/diagnostics", dependencies=[Depends(require_admin_token)])
+    profile_lock = threading.Lock()
+    allocations = AllocationTracker()
+
+    @router.get("/profile")
+    async def profile(seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+                      interval_ms: float = Query(10, ge=1, le=1000),
+                      format: str = Query("collapsed", pattern="^(collapsed|speedscope)$")):
+        if not profile_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        try:
+            # the sampler sleeps between samples, so it runs in a worker thread and sees the event loop too
+            stacks, samples = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+        finally:
+            profile_lock.release()
+        logger.info(f"CPU profile taken: {samples} samples over {seconds}s")
+        if format == "speedscope":
+            return speedscope(stacks, interval_ms / 1000)
+        return PlainTextResponse(collapsed(stacks))
+
+    @router.post("/tracemalloc/start")
+    async def tracemalloc_start(frames: int = Query(10, ge=1, le=100)):
+        allocations.start(frames)
+        return {"tracing": True}
+
+    @router.post("/tracemalloc/stop")
+    async def tracemalloc_stop():
+        allocations.stop()
+        return {"tracing": False}
+
+    @router.get("/tracemalloc/snapshot")
+    async def tracemalloc_snapshot(limit: int = Query(25, ge=1, le=500),
+                                   key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+        return await run_in_threadpool(allocations.snapshot, key_type, limit)
+
+    @router.get("/tracemalloc/diff")
+    async def tracemalloc_diff(limit: int = Query(25, ge=1, le=500),
+                               key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+        return await run_in_threadpool(allocations.diff, key_type, limit)
+
+    @router.get("/objects")
+    async def objects(top_types: int = Query(25, ge=1, le=500)):
+        return await run_in_threadpool(object_counts, orchestrator, mcp_server, rag_pipeline, top_types)
+
+    return router
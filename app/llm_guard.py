@@ -0,0 +1,176 @@
+# app/llm_guard.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from enum import Enum
+from typing import Any, Callable, Optional
+from app.config import Config, logger
+from app.metrics import llm_calls, llm_call_time, llm_hedged_calls, llm_circuit_state
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+# Values exported on the llm_circuit_state gauge
+BREAKER_STATE_VALUES = {BreakerState.CLOSED: 0, BreakerState.HALF_OPEN: 1, BreakerState.OPEN: 2}
+
+
+class LLMUnavailable(Exception):
+    """The LLM was skipped or did not answer within budget; callers fall back to rule-only scoring"""
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Trips open when the error rate or p95 latency over a sliding window crosses its threshold"""
+    def __init__(self, window: int = 50, min_calls: int = 10, error_rate_threshold: float = 0.5,
+                 p95_threshold_seconds: float = 6.0, open_seconds: float = 30.0, half_open_probes: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = deque(maxlen=window)  # (succeeded, latency_seconds)
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.p95_threshold_seconds = p95_threshold_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        llm_circuit_state.set(BREAKER_STATE_VALUES[self._state])
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the LLM now; half-open admits a limited number of probes"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == BreakerState.CLOSED:
+                return True
+            if self._state == BreakerState.HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def record(self, succeeded: bool, latency: float):
+        with self._lock:
+            if self._state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                slow = latency >= self.p95_threshold_seconds
+                if not succeeded or slow:
+                    self._transition(BreakerState.OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self.window.clear()
+                    self._transition(BreakerState.CLOSED)
+                return
+            if self._state == BreakerState.OPEN:
+                # late result of a call started before the breaker tripped
+                return
+            self.window.append((succeeded, latency))
+            if len(self.window) >= self.min_calls and self._should_trip():
+                self._transition(BreakerState.OPEN)
+
+    def _should_trip(self) -> bool:
+        errors = sum(1 for succeeded, _ in self.window if not succeeded)
+        if errors / len(self.window) >= self.error_rate_threshold:
+            return True
+        latencies = sorted(latency for _, latency in self.window)
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        return p95 >= self.p95_threshold_seconds
+
+    def _maybe_half_open(self):
+        if self._state == BreakerState.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._transition(BreakerState.HALF_OPEN)
+
+    def _transition(self, state: BreakerState):
+        if state == BreakerState.OPEN:
+            self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        logger.warning(f"LLM circuit breaker {self._state.value} -> {state.value}")
+        self._state = state
+        llm_circuit_state.set(BREAKER_STATE_VALUES[state])
+
+
+class LLMGuard:
+    """Runs LLM calls within a latency budget, hedging slow calls and honouring a circuit breaker"""
+    def __init__(self, llm, breaker: CircuitBreaker, budget_seconds: float,
+                 hedge_after_seconds: Optional[float] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.llm = llm
+        self.breaker = breaker
+        self.budget_seconds = budget_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.executor = executor or llm_executor
+
+    def invoke(self, messages, deadline: Optional[float] = None) -> Any:
+        """Return the first successful response or raise LLMUnavailable; deadline is on time.monotonic()"""
+        start = time.monotonic()
+        deadline = min(deadline, start + self.budget_seconds) if deadline else start + self.budget_seconds
+        if deadline <= start:
+            llm_calls.labels(outcome="budget_exhausted").inc()
+            raise LLMUnavailable("latency budget exhausted")
+        if not self.breaker.allow():
+            llm_calls.labels(outcome="short_circuit").inc()
+            raise LLMUnavailable("circuit open")
+
+        pending = {self.executor.submit(self.llm.invoke, messages)}
+        hedge_at = start + self.hedge_after_seconds if self.hedge_after_seconds is not None else None
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if hedge_at is not None and now >= hedge_at:
+                pending.add(self.executor.submit(self.llm.invoke, messages))
+                llm_hedged_calls.inc()
+                hedge_at = None
+                continue
+            timeout = min(deadline, hedge_at) - now if hedge_at is not None else deadline - now
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._abandon(pending)
+                    self._record("success", True, start)
+                    return future.result()
+                error = future.exception()
+
+        self._abandon(pending)
+        if pending:
+            self._record("timeout", False, start)
+            raise LLMUnavailable("latency budget exceeded")
+        self._record("error", False, start)
+        raise error
+
+    def _record(self, outcome: str, succeeded: bool, start: float):
+        latency = time.monotonic() - start
+        self.breaker.record(succeeded, latency)
+        llm_calls.labels(outcome=outcome).inc()
+        llm_call_time.observe(latency)
+
+    @staticmethod
+    def _abandon(futures):
+        # calls already running cannot be interrupted; their results are dropped
+        for future in futures:
+            future.cancel()
+
+
+llm_executor = ThreadPoolExecutor(max_workers=Config.LLM_MAX_WORKERS, thread_name_prefix="llm")
+llm_breaker = CircuitBreaker(
+    window=Config.LLM_BREAKER_WINDOW,
+    min_calls=Config.LLM_BREAKER_MIN_CALLS,
+    error_rate_threshold=Config.LLM_BREAKER_ERROR_RATE,
+    p95_threshold_seconds=Config.LLM_BREAKER_P95_SECONDS,
+    open_seconds=Config.LLM_BREAKER_OPEN_SECONDS,
+    half_open_probes=Config.LLM_BREAKER_HALF_OPEN_PROBES,
+)
@@ -1,16 +1,26 @@
 # app/main.py
+import functools
+from typing import Optional
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, JSONResponse
 from app.config import Config, logger
 from app.rag_pipeline import RAGPipeline
 from app.orchestrator import RiskAssessmentOrchestrator
 from app.mcp_server import MCPServer
-from app.metrics import api_requests, system_errors
-import prometheus_client
+from app.metrics import api_requests, system_errors, render_latest, multiprocess_enabled
 from prometheus_client import start_http_server
-from app.models import RiskAssessmentRequest, ComprehensiveRiskAssessment
+from app.models import (
+    RiskAssessmentRequest, ComprehensiveRiskAssessment, BatchRiskAssessmentRequest, BatchRiskAssessmentResponse,
+    StressTestRequest, StressTestResult
+)
+from app.llm_guard import llm_breaker
+from app.admission import admission, AdmissionRejected, Priority, client_id, request_priority
+from app.serialization import FastJSONResponse, negotiated_response
+from app.stress_test import run_stress_test
+from app.diagnostics import create_router as create_diagnostics_router
 
 app = FastAPI(title="Financial Risk Assessment API", version="1.0.0", openapi_url=None)
 
@@ -25,24 +35,68 @@ app.add_middleware(
 # Initialize components (singletons)
 rag_pipeline = RAGPipeline(Config.VECTOR_DB_PATH)
 orchestrator = RiskAssessmentOrchestrator(rag_pipeline)
-mcp_server = MCPServer()
+mcp_server = MCPServer(Config.ASSESSMENT_STORE_PATH)
+
+if Config.DIAGNOSTICS_ENABLED:
+    if not Config.DIAGNOSTICS_TOKEN:
+        logger.warning("DIAGNOSTICS_ENABLED is set without DIAGNOSTICS_TOKEN; diagnostics requests will be refused")
+    app.include_router(create_diagnostics_router(orchestrator, mcp_server, rag_pipeline))
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.reason}, headers=headers)
 
 @app.post("/assess", response_model=ComprehensiveRiskAssessment)
-async def assess_risk_endpoint(request: RiskAssessmentRequest, background_tasks: BackgroundTasks):
+async def assess_risk_endpoint(request: RiskAssessmentRequest, background_tasks: BackgroundTasks, http_request: Request):
     api_requests.labels(endpoint="/assess").inc()
+    async with admission.slot(client_id(http_request), request_priority(http_request, Priority.INTERACTIVE)):
+        try:
+            assessment = await orchestrator.assess_risk(request)
+            background_tasks.add_task(mcp_server.log_assessment, assessment, request)
+            # the orchestrator already built a validated model; skip response_model revalidation
+            return FastJSONResponse(assessment)
+        except Exception as e:
+            logger.error(f"Error in /assess: {e}")
+            system_errors.labels(component="api").inc()
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/assess/batch", response_model=BatchRiskAssessmentResponse)
+async def assess_batch_endpoint(batch: BatchRiskAssessmentRequest, background_tasks: BackgroundTasks,
+                                http_request: Request, accept: Optional[str] = Header(None)):
+    api_requests.labels(endpoint="/assess/batch").inc()
     try:
-        assessment = await orchestrator.assess_risk(request)
-        background_tasks.add_task(mcp_server.log_assessment, assessment)
-        return assessment
+        # one slot per assessment, so a large batch cannot exceed the concurrency limit on its own
+        assessments = await admission.run_all(
+            client_id(http_request), Priority.BATCH,
+            [functools.partial(orchestrator.assess_risk, request) for request in batch.requests])
+        background_tasks.add_task(mcp_server.log_assessments, assessments, batch.requests)
+        return negotiated_response({"assessments": assessments}, accept)
+    except AdmissionRejected:
+        raise
     except Exception as e:
-        logger.error(f"Error in /assess: {e}")
+        logger.error(f"Error in /assess/batch: {e}")
         system_errors.labels(component="api").inc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/stress-test", response_model=StressTestResult)
+async def stress_test_endpoint(request: StressTestRequest, http_request: Request):
+    api_requests.labels(endpoint="/stress-test").inc()
+    async with admission.slot(client_id(http_request), Priority.BATCH):
+        try:
+            # CPU-bound NumPy work, kept off the event loop
+            result = await run_in_threadpool(run_stress_test, request)
+            return FastJSONResponse(result)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error in /stress-test: {e}")
+            system_errors.labels(component="api").inc()
+            raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/metrics")
 async def metrics_endpoint():
-    data = prometheus_client.generate_latest()
-    return PlainTextResponse(content=data.decode("utf-8"), media_type="text/plain; version=0.0.4")
+    return PlainTextResponse(content=render_latest().decode("utf-8"), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health():
@@ -50,10 +104,14 @@ async def health():
         system_metrics = mcp_server.get_system_metrics()
     except Exception:
         system_metrics = {"system_health": "degraded"}
-    return {"status": "ok", "metrics": system_metrics}
+    return {"status": "ok", "llm_circuit": llm_breaker.state.value, "metrics": system_metrics}
 
 @app.on_event("startup")
 async def startup_event():
+    if multiprocess_enabled():
+        # Every worker runs this hook; only /metrics on the API port aggregates all of them
+        logger.info("Prometheus multiprocess mode enabled, serving aggregated metrics on /metrics")
+        return
     try:
         start_http_server(Config.PROMETHEUS_PORT)
         logger.info(f"Prometheus server started on port {Config.PROMETHEUS_PORT}")
@@ -1,10 +1,11 @@
 # app/mcp_server.py
-import json
 import os
 from datetime import datetime
 from typing import List, Dict
+import orjson
 from app.config import logger
 from app.metrics import system_errors
+from app.serialization import to_record, storage_format, encode_record, iter_records
 
 
 class MCPServer:
@@ -12,6 +13,8 @@ class MCPServer:
         self.assessments = {}  # in-memory store: {assessment_id: data}
         self.company_map = {}  # {company_id: [assessment_ids]}
         self.storage_file = storage_file
+        # .json keeps the full snapshot format; .jsonl/.msgpack append one record per assessment
+        self.storage_format = storage_format(storage_file)
 
         # Ensure folder exists
         os.makedirs(os.path.dirname(storage_file), exist_ok=True)
@@ -19,44 +22,60 @@ class MCPServer:
         # Load existing file if available
         if os.path.exists(storage_file):
             try:
-                with open(storage_file, "r") as f:
-                    data = json.load(f)
+                if self.storage_format == "json":
+                    with open(storage_file, "rb") as f:
+                        data = orjson.loads(f.read())
                     self.assessments = data.get("assessments", {})
                     self.company_map = data.get("company_map", {})
+                else:
+                    for record in iter_records(storage_file):
+                        self._index(record)
                 logger.info("Loaded existing assessments from file storage")
             except Exception as e:
                 logger.warning(f"Could not load existing assessments: {e}")
 
-    def _persist(self):
+    def _index(self, record: Dict):
+        self.assessments[record["assessment_id"]] = record
+        if record["company_id"] not in self.company_map:
+            self.company_map[record["company_id"]] = []
+        self.company_map[record["company_id"]].insert(0, record["assessment_id"])
+
+    def _persist(self, records: List[Dict]):
         """Save assessments to disk for persistence across restarts"""
         try:
-            with open(self.storage_file, "w") as f:
-                json.dump(
-                    {
-                        "assessments": self.assessments,
-                        "company_map": self.company_map,
-                    },
-                    f,
-                    indent=2,
-                    default=str,
+            if self.storage_format == "json":
+                payload = orjson.dumps(
+                    {"assessments": self.assessments, "company_map": self.company_map},
+                    option=orjson.OPT_INDENT_2,
                 )
+                with open(self.storage_file, "wb") as f:
+                    f.write(payload)
+            else:
+                with open(self.storage_file, "ab") as f:
+                    f.write(b"".join(encode_record(record, self.storage_format) for record in records))
         except Exception as e:
             logger.error(f"Failed to persist assessments: {e}")
             system_errors.labels(component="mcp_server").inc()
 
-    async def log_assessment(self, assessment):
-        """Save assessment to memory and file"""
-        try:
-            assessment_data = assessment.dict()
-            assessment_data["timestamp"] = assessment_data["timestamp"].isoformat()
-            self.assessments[assessment.assessment_id] = assessment_data
+    async def log_assessment(self, assessment, request=None):
+        """Save assessment, and the request it was scored from, to memory and file"""
+        await self.log_assessments([assessment], [request] if request is not None else None)
 
-            if assessment.company_id not in self.company_map:
-                self.company_map[assessment.company_id] = []
-            self.company_map[assessment.company_id].insert(0, assessment.assessment_id)
+    async def log_assessments(self, assessments, requests=None):
+        """Save a batch of assessments with a single write"""
+        try:
+            records = [to_record(assessment) for assessment in assessments]
+            # original inputs let the backtest re-score history under new rules
+            for record, request in zip(records, requests or []):
+                record["request"] = to_record(request)
+            for record in records:
+                self._index(record)
 
-            self._persist()
-            logger.info(f"Logged assessment {assessment.assessment_id}")
+            self._persist(records)
+            if len(records) == 1:
+                logger.info(f"Logged assessment {records[0]['assessment_id']}")
+            else:
+                logger.info(f"Logged {len(records)} assessments")
         except Exception as e:
             logger.error(f"Failed to log assessment: {e}")
             system_errors.labels(component="mcp_server").inc()
@@ -1,9 +1,57 @@
 # app/metrics.py
-from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest, multiprocess
+from app.config import Config
+
+# Score buckets line up with Config.RISK_THRESHOLDS so level boundaries can be read off the histogram
+RISK_SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.85, 1.0)
 
 agent_requests = Counter('agent_requests_total', 'Total agent requests', ['agent_type'])
 agent_response_time = Histogram('agent_response_seconds', 'Agent response time', ['agent_type'])
-risk_scores = Gauge('risk_score_current', 'Current risk scores', ['risk_type'])
+risk_scores = Histogram('risk_score', 'Distribution of assessed risk scores', ['risk_type', 'risk_level'],
+                        buckets=RISK_SCORE_BUCKETS)
 rag_queries = Counter('rag_queries_total', 'Total RAG queries')
+rag_chunks_deduplicated = Counter('rag_chunks_deduplicated_total', 'Chunks dropped before embedding', ['kind'])
 api_requests = Counter('api_requests_total', 'Total API requests', ['endpoint'])
 system_errors = Counter('system_errors_total', 'Total system errors', ['component'])
+llm_calls = Counter('llm_calls_total', 'Guarded LLM calls by outcome', ['outcome'])
+llm_call_time = Histogram('llm_call_seconds', 'Guarded LLM call latency, including hedges and timeouts')
+llm_hedged_calls = Counter('llm_hedged_calls_total', 'Hedge requests issued for slow LLM calls')
+# 0 closed, 1 half-open, 2 open; livemax reports the worst worker in multiprocess mode
+llm_circuit_state = Gauge('llm_circuit_state', 'LLM circuit breaker state', multiprocess_mode='livemax')
+admission_queue_depth = Gauge('admission_queue_depth', 'Requests waiting for an assessment slot', ['priority'],
+                              multiprocess_mode='livesum')
+admission_in_flight = Gauge('admission_in_flight', 'Requests holding an assessment slot', multiprocess_mode='livesum')
+admission_shed = Counter('admission_shed_total', 'Requests rejected by admission control', ['priority', 'reason'])
+admission_wait_time = Histogram('admission_wait_seconds', 'Time spent queued for an assessment slot', ['priority'])
+
+# labels() takes a lock and builds a key on every call; resolved children are cached per label pair
+_risk_score_children = {}
+
+
+def observe_risk_score(risk_type: str, risk_level, score: float) -> None:
+    """Record a score in the risk_score histogram"""
+    level = getattr(risk_level, "value", risk_level)
+    child = _risk_score_children.get((risk_type, level))
+    if child is None:
+        child = risk_scores.labels(risk_type=risk_type, risk_level=level)
+        _risk_score_children[(risk_type, level)] = child
+    child.observe(score)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(Config.PROMETHEUS_MULTIPROC_DIR)
+
+
+def mark_worker_dead(pid: int):
+    """Drop a dead worker's live gauges (in-flight, queue depth, breaker state) from the aggregate"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid, Config.PROMETHEUS_MULTIPROC_DIR)
+
+
+def render_latest() -> bytes:
+    """Exposition for /metrics, aggregated across workers in multiprocess mode"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -1,8 +1,9 @@
 # app/models.py
 from enum import Enum
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Literal, Optional
 from pydantic import BaseModel, Field
+from app.config import Config
 
 class RiskLevel(str, Enum):
     LOW = "low"
@@ -23,6 +24,7 @@ class RiskScore(BaseModel):
     level: RiskLevel
     factors: List[str]
     confidence: float = Field(ge=0, le=1)
+    llm_contributed: bool = False
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class ComprehensiveRiskAssessment(BaseModel):
@@ -35,4 +37,57 @@ class ComprehensiveRiskAssessment(BaseModel):
     overall_risk_level: RiskLevel
     recommendations: List[str]
     assessment_id: str
+    llm_contributed: bool = False
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class BatchRiskAssessmentRequest(BaseModel):
+    requests: List[RiskAssessmentRequest] = Field(min_length=1, max_length=Config.MAX_BATCH_SIZE)
+
+class BatchRiskAssessmentResponse(BaseModel):
+    assessments: List[ComprehensiveRiskAssessment]
+
+class ScoringConfig(BaseModel):
+    """Candidate scoring rules; anything left unset uses the live Config and rule tables"""
+    weights: Optional[Dict[str, float]] = None
+    thresholds: Optional[Dict[str, float]] = None
+    rules: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+class StressShock(BaseModel):
+    """Shock to one scoring input; value is the shift/factor/level for fixed shocks and the mean for normal ones"""
+    field: str
+    kind: Literal["add", "multiply", "set"] = "add"
+    distribution: Literal["fixed", "normal", "uniform", "grid"] = "fixed"
+    value: float = 0.0
+    std: float = Field(0.0, ge=0)
+    low: Optional[float] = None
+    high: Optional[float] = None
+    values: Optional[List[float]] = None
+
+class StressTestRequest(BaseModel):
+    base: RiskAssessmentRequest
+    shocks: List[StressShock] = Field(default_factory=list)
+    n_scenarios: int = Field(10000, ge=1, le=1_000_000)
+    seed: Optional[int] = None
+
+class ScoreDistribution(BaseModel):
+    mean: float
+    std: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]
+
+class StressScenarioResult(BaseModel):
+    grid_point: Dict[str, float]
+    n_scenarios: int
+    overall_risk_score: ScoreDistribution
+    level_probabilities: Dict[RiskLevel, float]
+
+class StressTestResult(BaseModel):
+    company_id: str
+    n_scenarios: int
+    base_overall_risk_score: float
+    base_overall_risk_level: RiskLevel
+    overall_risk_score: ScoreDistribution
+    level_probabilities: Dict[RiskLevel, float]
+    mean_scores: Dict[str, float]
+    grid: List[StressScenarioResult] = Field(default_factory=list)
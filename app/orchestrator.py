@@ -6,8 +6,11 @@ from app.rag_pipeline import RAGPipeline
 from app.agents import CreditRiskAgent, MarketRiskAgent, OperationalRiskAgent, ComplianceRiskAgent
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+import time
 from datetime import datetime
-from app.metrics import risk_scores
+from app.metrics import observe_risk_score
+from app.config import Config
+from app.scoring import overall_score as compute_overall_score, risk_level
 
 class AgentState(TypedDict):
     messages: List[Any]
@@ -21,6 +24,7 @@ class AgentState(TypedDict):
     compliance_risk: Any
     rag_context: Any
     iteration: int
+    llm_deadline: float
     final_assessment: Any
 
 class RiskAssessmentOrchestrator:
@@ -55,7 +59,11 @@ class RiskAssessmentOrchestrator:
     def rag_retrieval_node(self, state: AgentState) -> Dict:
         company_id = state["company_id"]
         query = f"Financial risk assessment for company {company_id} including credit, market, operational, and compliance risks"
-        context = self.rag_pipeline.query(query)
+        filters = {"company_id": company_id}
+        if not self.rag_pipeline.has_documents(filters):
+            # never another company's filings; at most the documents not tagged to any company
+            filters = {"company_id": None} if Config.RAG_FALLBACK_UNTAGGED else None
+        context = self.rag_pipeline.query(query, filters=filters) if filters else ""
         return {"rag_context": context}
 
     def credit_analysis_node(self, state: AgentState) -> Dict:
@@ -80,22 +88,13 @@ class RiskAssessmentOrchestrator:
         operational_risk = state["operational_risk"]
         compliance_risk = state["compliance_risk"]
 
-        weights = {"credit": 0.3, "market": 0.25, "operational": 0.2, "compliance": 0.25}
-        overall_score = (
-            credit_risk.score * weights["credit"] +
-            market_risk.score * weights["market"] +
-            operational_risk.score * weights["operational"] +
-            compliance_risk.score * weights["compliance"]
-        )
-
-        if overall_score < 0.3:
-            overall_level = credit_risk.level.__class__.LOW
-        elif overall_score < 0.6:
-            overall_level = credit_risk.level.__class__.MEDIUM
-        elif overall_score < 0.85:
-            overall_level = credit_risk.level.__class__.HIGH
-        else:
-            overall_level = credit_risk.level.__class__.CRITICAL
+        overall_score = compute_overall_score({
+            "credit": credit_risk.score,
+            "market": market_risk.score,
+            "operational": operational_risk.score,
+            "compliance": compliance_risk.score,
+        })
+        overall_level = risk_level(overall_score)
 
         recommendations = self._generate_recommendations(credit_risk, market_risk, operational_risk, compliance_risk)
         assessment = ComprehensiveRiskAssessment(
@@ -107,9 +106,10 @@ class RiskAssessmentOrchestrator:
             overall_risk_score=overall_score,
             overall_risk_level=overall_level,
             recommendations=recommendations,
-            assessment_id=f"RA-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            llm_contributed=any(r.llm_contributed for r in (credit_risk, market_risk, operational_risk, compliance_risk)),
+            assessment_id=f"RA-{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
         )
-        risk_scores.labels(risk_type="overall").set(overall_score)
+        observe_risk_score("overall", overall_level, overall_score)
         return {"final_assessment": assessment}
 
     def _generate_recommendations(self, credit_risk, market_risk, operational_risk, compliance_risk):
@@ -154,6 +154,8 @@ class RiskAssessmentOrchestrator:
             "compliance_risk": None,
             "rag_context": None,
             "iteration": 0,
+            # shared by every LLM call in this request, on time.monotonic()
+            "llm_deadline": time.monotonic() + Config.LLM_LATENCY_BUDGET_SECONDS,
             "final_assessment": None
         }
         config = {"configurable": {"thread_id": request.company_id}}
@@ -1,14 +1,95 @@
 import os
+import json
 import logging
-from typing import List
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import faiss
+import numpy as np
 from app.config import Config, logger
-from app.metrics import rag_queries, system_errors
+from app.dedup import NearDuplicateIndex, drop_similar
+from app.metrics import rag_queries, rag_chunks_deduplicated, system_errors
 
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import PyPDFLoader
 
+# Chunk metadata fields that can be used as query filters
+METADATA_FIELDS = ("company_id", "document_type", "fiscal_period", "source_file")
+# Below this many candidate ids a flat index is scanned directly instead of through an ID selector
+EXACT_SCAN_MAX_IDS = 4096
+NEAR_DUP_PARTITION_FIELDS = ("company_id", "document_type", "fiscal_period")
+
+
+class MetadataIndex:
+    """Inverted index from (field, value) to FAISS row ids; (field, None) holds rows without that field"""
+    def __init__(self):
+        self._postings: Dict[Tuple[str, Optional[str]], set] = defaultdict(set)
+        self._tagged: Dict[str, set] = defaultdict(set)
+
+    def __len__(self) -> int:
+        """Number of non-empty (field, value) postings"""
+        return sum(1 for ids in self._postings.values() if ids)
+
+    def add(self, faiss_id: int, metadata: Dict[str, Any]):
+        """Index the row's own tags and those of duplicates folded into it ("aliases")"""
+        for tags in (metadata, *metadata.get("aliases", ())):
+            for field in METADATA_FIELDS:
+                value = tags.get(field)
+                if value is not None:
+                    self._postings[(field, str(value))].add(faiss_id)
+                    self._tagged[field].add(faiss_id)
+                    self._postings[(field, None)].discard(faiss_id)
+                elif faiss_id not in self._tagged[field]:
+                    self._postings[(field, None)].add(faiss_id)
+
+    def lookup(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Ids matching every filter, as a sorted int64 array; a None value matches rows without the field"""
+        postings = sorted((self._postings.get((field, None if value is None else str(value)), set())
+                           for field, value in filters.items()), key=len)
+        if not postings or not postings[0]:
+            return np.empty(0, dtype=np.int64)
+        ids = set(postings[0]).intersection(*postings[1:])
+        return np.fromiter(sorted(ids), dtype=np.int64, count=len(ids))
+
+
+def filtered_search(index, vector: np.ndarray, k: int, ids: np.ndarray) -> List[Tuple[int, float]]:
+    """Top-k (id, distance) restricted to ids, without scoring the rest of the index"""
+    if len(ids) == 0:
+        return []
+    query = np.ascontiguousarray(vector, dtype=np.float32).reshape(1, -1)
+    k = min(k, len(ids))
+    if len(ids) <= EXACT_SCAN_MAX_IDS and isinstance(index, faiss.IndexFlat):
+        vectors = index.reconstruct_batch(ids)
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            distances = vectors @ query[0]
+            order = np.argsort(-distances)[:k]
+        else:
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(distances)[:k]
+        return [(int(ids[i]), float(distances[i])) for i in order]
+
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(ids))
+    distances, labels = index.search(query, k, params=params)
+    return [(int(label), float(distance)) for label, distance in zip(labels[0], distances[0]) if label != -1]
+
+
+def _partition(metadata: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Near-duplicate scope: chunks only replace near copies from the same company, document type and period"""
+    return tuple(metadata.get(field) for field in NEAR_DUP_PARTITION_FIELDS)
+
+
+def _fold_tags(kept, metadata: Dict[str, Any]) -> bool:
+    """Record a dropped duplicate's filter tags on the chunk that was kept; False if nothing new"""
+    tags = {field: metadata[field] for field in METADATA_FIELDS if metadata.get(field) is not None}
+    own = {field: kept.metadata[field] for field in METADATA_FIELDS if kept.metadata.get(field) is not None}
+    aliases = kept.metadata.get("aliases", [])
+    if tags.items() <= own.items() or tags in aliases:
+        return False
+    kept.metadata["aliases"] = aliases + [tags]
+    return True
+
+
 class RAGPipeline:
     """Retrieval-Augmented Generation for financial documents"""
     def __init__(self, vector_db_path: str, documents_path: str ="documents"):
@@ -16,12 +97,16 @@ class RAGPipeline:
         self.vector_db_path = vector_db_path
         self.documents_path = documents_path
         self.vector_store = None
+        self.metadata_index = MetadataIndex()
+        self.dedup_index: Optional[NearDuplicateIndex] = None
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
         )
         self._initialize_vector_store()
+        self._index_documents(0)
+        self._rebuild_dedup_index()
         self._load_documents_from_folder()
 
     def _initialize_vector_store(self):
@@ -51,6 +136,42 @@ class RAGPipeline:
             logger.error(f"Error saving new vector store: {e}")
             system_errors.labels(component="rag_pipeline_save").inc()
 
+    def _document(self, faiss_id: int):
+        return self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[faiss_id])
+
+    def _index_documents(self, start: int):
+        """Add metadata of FAISS rows from start onwards to the inverted index"""
+        if self.vector_store is None:
+            return
+        for faiss_id in range(start, self.vector_store.index.ntotal):
+            doc = self._document(faiss_id)
+            if hasattr(doc, "metadata"):
+                self.metadata_index.add(faiss_id, doc.metadata)
+
+    def _rebuild_dedup_index(self):
+        """Seed the duplicate index from the rows already in the store"""
+        if not Config.RAG_DEDUP_ENABLED:
+            return
+        self.dedup_index = NearDuplicateIndex(Config.RAG_NEAR_DUP_THRESHOLD)
+        if self.vector_store is None:
+            return
+        for faiss_id in range(self.vector_store.index.ntotal):
+            doc = self._document(faiss_id)
+            if hasattr(doc, "page_content"):
+                self.dedup_index.add(doc.page_content, faiss_id, _partition(doc.metadata))
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Per-file metadata from documents/manifest.json, keyed by file name"""
+        manifest_path = os.path.join(self.documents_path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read document manifest {manifest_path}: {e}")
+            return {}
+
     def _load_documents_from_folder(self):
         """Automatically load all the PDF documents from the doc folder"""
         if not os.path.exists(self.documents_path):
@@ -60,40 +181,116 @@ class RAGPipeline:
             os.path.join(self.documents_path, f) for f in os.listdir(self.documents_path) if f.endswith('.pdf')]
         if pdf_files:
             logger.info(f"Foiund {len(pdf_files)} PDF files to load")
-            self.add_documents(pdf_files)
+            self.add_documents(pdf_files, self._load_manifest())
         else:
             logger.warning(f"No pdf files found in {self.documents_path}")
 
             
-    def add_documents(self, file_paths: List[str]):
+    def add_documents(self, file_paths: List[str], metadata: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Split, tag and index PDFs; metadata maps file name to company_id/document_type/fiscal_period"""
+        metadata = metadata or {}
+        start = self.vector_store.index.ntotal if self.vector_store is not None else 0
         all_documents = []
+        folded = 0
         for file_path in file_paths:
             try:
                 loader = PyPDFLoader(file_path)
                 documents = loader.load()
                 split_docs = self.text_splitter.split_documents(documents)
-                all_documents.extend(split_docs)
-                logger.info(f"Loaded {len(split_docs)} chunks from {file_path}")
+                source_file = os.path.basename(file_path)
+                file_metadata = {"source_file": source_file, **metadata.get(source_file, {})}
+                for doc in split_docs:
+                    doc.metadata.update(file_metadata)
+                unique_docs, folded_docs = self._drop_duplicates(split_docs, all_documents, start)
+                all_documents.extend(unique_docs)
+                folded += folded_docs
+                logger.info(f"Loaded {len(unique_docs)} chunks from {file_path} "
+                            f"({len(split_docs) - len(unique_docs)} duplicates skipped)")
             except Exception as e:
                 logger.error(f"Error loading document {file_path}: {e}")
                 system_errors.labels(component="document_loader").inc()
 
-        if all_documents:
+        if all_documents or folded:
             try:
-                self.vector_store.add_documents(all_documents)
+                if all_documents:
+                    self.vector_store.add_documents(all_documents)
+                    self._index_documents(start)
+                # also persists tags of duplicates folded into rows that were already stored
                 self.vector_store.save_local(self.vector_db_path)
-                logger.info(f"Added {len(all_documents)} documents to vector store")
+                logger.info(f"Added {len(all_documents)} documents to vector store, "
+                            f"tagged {folded} stored documents with their duplicates' metadata")
             except Exception as e:
                 logger.error(f"Error saving documents to vector store: {e}")
                 system_errors.labels(component="rag_pipeline_save").inc()
+                # drop entries for rows that never made it into the store
+                self._rebuild_dedup_index()
+
+    def _drop_duplicates(self, documents, pending: List, start: int) -> Tuple[List, int]:
+        """Chunks that are not duplicates of a stored or pending chunk, and how many duplicates were
+        folded into stored rows. A duplicate's tags are kept on the chunk it duplicates, so metadata
+        filters still find it. That is only safe for exact copies: a near copy can differ in a figure, so
+        near duplicates are matched within one company, document type and fiscal period and not folded."""
+        if self.dedup_index is None:
+            return documents, 0
+        unique = []
+        folded = 0
+        for doc in documents:
+            faiss_id = start + len(pending) + len(unique)
+            match = self.dedup_index.add(doc.page_content, faiss_id, _partition(doc.metadata))
+            if match is None:
+                unique.append(doc)
+                continue
+            kind, kept_id = match
+            rag_chunks_deduplicated.labels(kind=kind).inc()
+            if kind == "near":
+                continue
+            position = kept_id - start
+            if position < 0:
+                kept = self._document(kept_id)
+                if _fold_tags(kept, doc.metadata):
+                    self.metadata_index.add(kept_id, doc.metadata)
+                    folded += 1
+            else:
+                # not embedded yet; the tags are indexed with the row when it is added
+                _fold_tags(pending[position] if position < len(pending) else unique[position - len(pending)],
+                           doc.metadata)
+        return unique, folded
 
-    def query(self, query: str, k: int = 5) -> str:
+    def query(self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None) -> str:
+        """Top-k chunks for query, restricted to chunks whose metadata matches every filter"""
         rag_queries.inc()
         try:
-            results = self.vector_store.similarity_search(query, k=k)
+            results = self._similarity_search(query, k, filters)
             context = "\n\n".join([doc.page_content for doc in results])
             return context
         except Exception as e:
             logger.error(f"Error querying vector store: {e}")
             system_errors.labels(component="rag_query").inc()
             return ""
+
+    def _similarity_search(self, query: str, k: int, filters: Optional[Dict[str, Any]] = None):
+        """Top-k documents, skipping results nearly identical to a better-ranked one"""
+        index = self.vector_store.index
+        if filters:
+            ids = self.metadata_index.lookup(filters)
+            if len(ids) == 0:
+                return []
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        if getattr(self.vector_store, "_normalize_L2", False):
+            vector /= np.linalg.norm(vector)
+
+        dedup = Config.RAG_RESULT_SIMILARITY_CUTOFF < 1 and isinstance(index, faiss.IndexFlat)
+        fetch = k * Config.RAG_RESULT_FETCH_FACTOR if dedup else k
+        if filters:
+            hit_ids = [i for i, _ in filtered_search(index, vector, fetch, ids)]
+        else:
+            _, labels = index.search(vector.reshape(1, -1), min(fetch, index.ntotal))
+            hit_ids = [int(i) for i in labels[0] if i != -1]
+        if dedup and len(hit_ids) > 1:
+            kept = drop_similar(index.reconstruct_batch(np.asarray(hit_ids, dtype=np.int64)), k,
+                                Config.RAG_RESULT_SIMILARITY_CUTOFF)
+            hit_ids = [hit_ids[i] for i in kept]
+        return [self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[i]) for i in hit_ids[:k]]
+
+    def has_documents(self, filters: Dict[str, Any]) -> bool:
+        return len(self.metadata_index.lookup(filters)) > 0
@@ -0,0 +1,165 @@
+# app/scoring.py
+import operator
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.config import Config
+from app.models import RiskLevel
+
+# Rule tables behind the agents' deterministic scores. Each rule reads one field (from financial_data
+# unless source is "market_data") and adds the weight of the first matching tier. Rules with
+# "requires" only apply when that compliance requirement was requested.
+RISK_RULES: Dict[str, List[Dict[str, Any]]] = {
+    "credit": [
+        {"field": "debt_to_equity", "default": 0, "tiers": [
+            [">", 2, 0.3, "High debt-to-equity ratio"],
+            [">", 1, 0.15, "Moderate debt-to-equity ratio"]]},
+        {"field": "current_ratio", "default": 1, "tiers": [
+            ["<", 1, 0.25, "Poor liquidity position"],
+            ["<", 1.5, 0.1, "Moderate liquidity"]]},
+        {"field": "interest_coverage", "default": 1, "tiers": [
+            ["<", 1.5, 0.25, "Weak interest coverage"],
+            ["<", 3, 0.1, "Moderate interest coverage"]]},
+        {"field": "revenue_growth", "default": 0, "tiers": [
+            ["<", -0.1, 0.2, "Declining revenue"],
+            ["<", 0, 0.1, "Stagnant revenue growth"]]},
+    ],
+    "market": [
+        {"field": "volatility", "source": "market_data", "default": 0, "tiers": [
+            [">", 0.3, 0.25, "High market volatility"],
+            [">", 0.2, 0.15, "Moderate market volatility"]]},
+        {"field": "beta", "source": "market_data", "default": 1.0, "tiers": [
+            [">", 1.5, 0.2, "High systematic risk (beta > 1.5)"],
+            [">", 1.2, 0.1, "Above-average systematic risk"]]},
+        {"field": "foreign_currency_exposure", "default": 0, "tiers": [
+            [">", 0.5, 0.2, "Significant foreign currency exposure"],
+            [">", 0.3, 0.1, "Moderate foreign currency exposure"]]},
+        {"field": "commodity_exposure", "default": 0, "tiers": [
+            [">", 0.4, 0.15, "High commodity price risk"]]},
+    ],
+    "operational": [
+        {"field": "system_downtime_hours", "default": 0, "tiers": [
+            [">", 100, 0.2, "Significant IT system downtime"],
+            [">", 50, 0.1, "Moderate IT system issues"]]},
+        {"field": "employee_turnover_rate", "default": 0, "tiers": [
+            [">", 0.25, 0.15, "High employee turnover"],
+            [">", 0.15, 0.08, "Above-average employee turnover"]]},
+        {"field": "process_error_rate", "default": 0, "tiers": [
+            [">", 0.05, 0.2, "High process error rate"],
+            [">", 0.02, 0.1, "Moderate process errors"]]},
+        {"field": "top_supplier_concentration", "default": 0, "tiers": [
+            [">", 0.5, 0.25, "High supplier concentration risk"],
+            [">", 0.3, 0.12, "Moderate supplier dependency"]]},
+        {"field": "security_incidents_year", "default": 0, "tiers": [
+            [">", 5, 0.3, "Multiple cybersecurity incidents"],
+            [">", 2, 0.15, "Some cybersecurity concerns"]]},
+    ],
+    "compliance": [
+        {"field": "regulatory_violations_year", "default": 0, "tiers": [
+            [">", 3, 0.35, "Multiple regulatory violations"],
+            [">", 1, 0.2, "Some regulatory violations"],
+            ["==", 1, 0.1, "Minor regulatory violation"]]},
+        {"field": "compliance_audit_findings", "default": 0, "tiers": [
+            [">", 10, 0.25, "Significant compliance audit findings"],
+            [">", 5, 0.15, "Moderate audit findings"]]},
+        {"field": "sox_compliant", "default": True, "requires": "SOX", "tiers": [
+            ["not", None, 0.2, "SOX compliance issues"]]},
+        {"field": "gdpr_compliant", "default": True, "requires": "GDPR", "tiers": [
+            ["not", None, 0.15, "GDPR compliance gaps"]]},
+        {"field": "basel_compliant", "default": True, "requires": "Basel III", "tiers": [
+            ["not", None, 0.25, "Basel III non-compliance"]]},
+        {"field": "pending_litigation", "default": 0, "tiers": [
+            [">", 5, 0.2, "Significant pending litigation"],
+            [">", 2, 0.1, "Some pending litigation"]]},
+    ],
+}
+
+RISK_TYPES = tuple(RISK_RULES)
+LEVELS = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL)
+
+_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "not": lambda value, _: not value,
+}
+_VECTOR_OPS = {**_OPS, "not": lambda value, _: np.logical_not(value)}
+
+
+def rule_value(rule: Dict[str, Any], financial_data: Dict[str, Any], market_data: Optional[Dict[str, Any]]):
+    source = (market_data or {}) if rule.get("source") == "market_data" else financial_data
+    return source.get(rule["field"], rule["default"])
+
+
+def applicable_rules(rules: List[Dict[str, Any]], compliance_requirements: Iterable[str]) -> List[Dict[str, Any]]:
+    """Rules that apply; requirement rules are evaluated in the order the requirements were given, once
+    per occurrence, so a repeated requirement counts again as it always has for the compliance agent"""
+    by_requirement = {rule["requires"]: rule for rule in rules if rule.get("requires") is not None}
+    if not by_requirement:
+        return rules
+    requirements = list(compliance_requirements or ())
+    applicable = []
+    for rule in rules:
+        if rule.get("requires") is None:
+            applicable.append(rule)
+        elif rule is next(iter(by_requirement.values())):
+            applicable.extend(by_requirement[r] for r in requirements if r in by_requirement)
+    return applicable
+
+
+def score_rules(rules: List[Dict[str, Any]], financial_data: Dict[str, Any],
+                market_data: Optional[Dict[str, Any]] = None,
+                compliance_requirements: Iterable[str] = ()) -> Tuple[float, List[str]]:
+    """Rule-only score (capped at 1.0) and the factors that fired"""
+    score = 0.0
+    factors: List[str] = []
+    for rule in applicable_rules(rules, compliance_requirements):
+        value = rule_value(rule, financial_data, market_data)
+        for op, threshold, weight, factor in rule["tiers"]:
+            if _OPS[op](value, threshold):
+                score += weight
+                factors.append(factor)
+                break
+    return min(1.0, score), factors
+
+
+def score_rules_vectorized(rules: List[Dict[str, Any]], columns: Dict[str, Any], size: int,
+                           compliance_requirements: Iterable[str] = ()) -> np.ndarray:
+    """score_rules over many scenarios; columns map rule fields to scalars or arrays of length size"""
+    score = np.zeros(size)
+    for rule in applicable_rules(rules, compliance_requirements):
+        value = columns[rule["field"]]
+        conditions = [_VECTOR_OPS[op](value, threshold) for op, threshold, _, _ in rule["tiers"]]
+        weights = [weight for _, _, weight, _ in rule["tiers"]]
+        if np.ndim(value) == 0:
+            # unshocked field: one contribution for every scenario
+            score += next((w for c, w in zip(conditions, weights) if c), 0.0)
+        else:
+            score += np.select(conditions, weights, default=0.0)
+    return np.minimum(score, 1.0)
+
+
+def risk_level(score: float, thresholds: Optional[Dict[str, float]] = None) -> RiskLevel:
+    thresholds = thresholds or Config.RISK_THRESHOLDS
+    if score < thresholds["low"]:
+        return RiskLevel.LOW
+    elif score < thresholds["medium"]:
+        return RiskLevel.MEDIUM
+    elif score < thresholds["high"]:
+        return RiskLevel.HIGH
+    else:
+        return RiskLevel.CRITICAL
+
+
+def risk_level_indices(scores: np.ndarray, thresholds: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Index into LEVELS for each score, matching risk_level"""
+    thresholds = thresholds or Config.RISK_THRESHOLDS
+    edges = np.array([thresholds["low"], thresholds["medium"], thresholds["high"]])
+    return np.searchsorted(edges, scores, side="right")
+
+
+def overall_score(scores: Dict[str, Any], weights: Optional[Dict[str, float]] = None):
+    """Weighted sum of per-type scores; works on floats and arrays alike"""
+    weights = weights or Config.RISK_WEIGHTS
+    return sum(scores[risk_type] * weights[risk_type] for risk_type in RISK_TYPES)
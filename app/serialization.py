@@ -0,0 +1,96 @@
+# app/serialization.py
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional
+
+import msgpack
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types the encoders don't handle natively"""
+    if isinstance(obj, BaseModel):
+        # already validated when it was built, so dump without revalidating
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(Response):
+    """orjson-backed JSON response that accepts pydantic models as content"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # non-str keys covers enum-keyed dicts such as level probabilities
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgpackResponse(Response):
+    """Compact binary response for clients sending Accept: application/msgpack"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default)
+
+
+def negotiated_response(content: Any, accept: Optional[str]) -> Response:
+    if accept and MSGPACK_MEDIA_TYPE in accept:
+        return MsgpackResponse(content)
+    return FastJSONResponse(content)
+
+
+def to_record(model: BaseModel) -> Dict[str, Any]:
+    """JSON-compatible dict for storage (datetimes and enums as strings)"""
+    return model.model_dump(mode="json")
+
+
+def storage_format(path: str) -> str:
+    """Store format from file extension: append-only 'jsonl'/'msgpack' logs or a 'json' snapshot"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        return "jsonl"
+    if ext in (".msgpack", ".mpk"):
+        return "msgpack"
+    return "json"
+
+
+def encode_record(record: Dict[str, Any], fmt: str) -> bytes:
+    if fmt == "msgpack":
+        return msgpack.packb(record, default=_default)
+    return orjson.dumps(record, default=_default) + b"\n"
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from an append-only store log one at a time"""
+    fmt = storage_format(path)
+    if fmt == "msgpack":
+        with open(path, "rb") as f:
+            yield from msgpack.Unpacker(f, raw=False)
+    elif fmt == "jsonl":
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    else:
+        raise ValueError(f"{path} is a snapshot store and cannot be streamed")
+
+
+def convert_snapshot(snapshot_path: str, log_path: str) -> int:
+    """Rewrite a .json snapshot store as a .jsonl/.msgpack log that can be streamed; returns the record count"""
+    fmt = storage_format(log_path)
+    if storage_format(snapshot_path) != "json" or fmt == "json":
+        raise ValueError("convert_snapshot reads a .json snapshot and writes a .jsonl or .msgpack log")
+    with open(snapshot_path, "rb") as f:
+        records = orjson.loads(f.read()).get("assessments", {}).values()
+    with open(log_path, "wb") as f:
+        for record in records:
+            f.write(encode_record(record, fmt))
+    return len(records)
@@ -0,0 +1,138 @@
+# app/stress_test.py
+import itertools
+from typing import Any, Dict, List
+import numpy as np
+from app.models import (
+    RiskAssessmentRequest, StressShock, StressTestRequest, StressTestResult, StressScenarioResult, ScoreDistribution
+)
+from app.scoring import (
+    RISK_RULES, RISK_TYPES, LEVELS, rule_value, score_rules_vectorized, risk_level_indices, overall_score, risk_level
+)
+
+MAX_STRESS_SCENARIOS = 1_000_000
+# Scenarios scored per NumPy pass; bounds peak memory to a few arrays of this length per input field
+CHUNK_SIZE = 100_000
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+STRESS_FIELDS = sorted({rule["field"] for rules in RISK_RULES.values() for rule in rules})
+
+
+def base_columns(request: RiskAssessmentRequest) -> Dict[str, Any]:
+    """Every rule input of the base request, with the agents' defaults for missing fields"""
+    return {
+        rule["field"]: rule_value(rule, request.financial_data, request.market_data)
+        for rules in RISK_RULES.values() for rule in rules
+    }
+
+
+def _validate(shocks: List[StressShock]):
+    for shock in shocks:
+        if shock.field not in STRESS_FIELDS:
+            raise ValueError(f"Unknown stress field '{shock.field}', expected one of {', '.join(STRESS_FIELDS)}")
+        if shock.distribution == "uniform" and (shock.low is None or shock.high is None or shock.low > shock.high):
+            raise ValueError(f"Uniform shock on '{shock.field}' needs low <= high")
+        if shock.distribution == "grid" and not shock.values:
+            raise ValueError(f"Grid shock on '{shock.field}' needs at least one value")
+
+
+def _draw(shock: StressShock, size: int, rng: np.random.Generator):
+    if shock.distribution == "normal":
+        return rng.normal(shock.value, shock.std, size)
+    if shock.distribution == "uniform":
+        return rng.uniform(shock.low, shock.high, size)
+    return shock.value
+
+
+def _apply(base, shock: StressShock, draw):
+    if shock.kind == "set":
+        return draw
+    if base is None or isinstance(base, (bool, np.bool_)):
+        raise ValueError(f"Cannot {shock.kind} a shock to non-numeric field '{shock.field}', use kind 'set'")
+    try:
+        base = float(base) if np.ndim(base) == 0 else base
+    except (TypeError, ValueError):
+        raise ValueError(f"Field '{shock.field}' has non-numeric base value {base!r}")
+    return base + draw if shock.kind == "add" else base * draw
+
+
+def score_columns(columns: Dict[str, Any], size: int, compliance_requirements: List[str]) -> Dict[str, np.ndarray]:
+    """Rule-only per-type and overall scores for size scenarios, without LLM or RAG"""
+    scores = {
+        risk_type: score_rules_vectorized(RISK_RULES[risk_type], columns, size, compliance_requirements)
+        for risk_type in RISK_TYPES
+    }
+    scores["overall"] = overall_score(scores)
+    return scores
+
+
+def _distribution(scores: np.ndarray) -> ScoreDistribution:
+    percentiles = np.percentile(scores, PERCENTILES)
+    return ScoreDistribution(
+        mean=float(scores.mean()),
+        std=float(scores.std()),
+        min=float(scores.min()),
+        max=float(scores.max()),
+        percentiles={f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+    )
+
+
+def _level_probabilities(scores: np.ndarray) -> Dict[str, float]:
+    counts = np.bincount(risk_level_indices(scores), minlength=len(LEVELS))
+    return {level: float(count) / len(scores) for level, count in zip(LEVELS, counts)}
+
+
+def run_stress_test(request: StressTestRequest) -> StressTestResult:
+    """Monte Carlo / grid stress test of the rule-based scores of one company"""
+    _validate(request.shocks)
+    grid_indices = [i for i, shock in enumerate(request.shocks) if shock.distribution == "grid"]
+    grid_shocks = [request.shocks[i] for i in grid_indices]
+    random_shocks = any(shock.distribution in ("normal", "uniform") for shock in request.shocks)
+    grid_points = list(itertools.product(*(shock.values for shock in grid_shocks)))
+    # without random shocks every draw would be identical
+    n = request.n_scenarios if random_shocks else 1
+    if len(grid_points) * n > MAX_STRESS_SCENARIOS:
+        raise ValueError(f"{len(grid_points)} grid points x {n} scenarios exceeds {MAX_STRESS_SCENARIOS}")
+
+    rng = np.random.default_rng(request.seed)
+    base = base_columns(request.base)
+    requirements = request.base.compliance_requirements or []
+    base_overall = float(score_columns(base, 1, requirements)["overall"][0])
+
+    overall_by_point = []
+    type_sums = dict.fromkeys(RISK_TYPES, 0.0)
+    grid_results = []
+    for point in grid_points:
+        grid_values = dict(zip(grid_indices, point))
+        chunks = []
+        for start in range(0, n, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, n - start)
+            columns = dict(base)
+            # shocks apply in request order so several shocks on one field compose
+            for i, shock in enumerate(request.shocks):
+                draw = grid_values[i] if shock.distribution == "grid" else _draw(shock, size, rng)
+                columns[shock.field] = _apply(columns[shock.field], shock, draw)
+            scores = score_columns(columns, size, requirements)
+            for risk_type in RISK_TYPES:
+                type_sums[risk_type] += float(scores[risk_type].sum())
+            chunks.append(scores["overall"])
+        overall = np.concatenate(chunks)
+        overall_by_point.append(overall)
+        if grid_shocks:
+            grid_results.append(StressScenarioResult(
+                grid_point={shock.field: value for shock, value in zip(grid_shocks, point)},
+                n_scenarios=n,
+                overall_risk_score=_distribution(overall),
+                level_probabilities=_level_probabilities(overall),
+            ))
+
+    all_overall = np.concatenate(overall_by_point)
+    total = len(all_overall)
+    return StressTestResult(
+        company_id=request.base.company_id,
+        n_scenarios=total,
+        base_overall_risk_score=base_overall,
+        base_overall_risk_level=risk_level(base_overall),
+        overall_risk_score=_distribution(all_overall),
+        level_probabilities=_level_probabilities(all_overall),
+        mean_scores={**{t: s / total for t, s in type_sums.items()}, "overall": float(all_overall.mean())},
+        grid=grid_results,
+    )
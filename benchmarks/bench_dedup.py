@@ -0,0 +1,80 @@
+"""Chunks, index size and ingestion time saved by duplicate elimination.
+
+Splits the PDFs under documents/ the way RAGPipeline does and runs the chunks
+through NearDuplicateIndex. --copies ingests the corpus several times over,
+the way amended filings and re-uploads repeat most of a document. Embedding
+time saved is measured with the MiniLM model when it can be loaded:
+
+    python -m benchmarks.bench_dedup --documents documents --copies 3
+"""
+import argparse
+import os
+import time
+
+from langchain.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.config import Config
+from app.dedup import NearDuplicateIndex
+
+DIM = 384
+
+
+def load_chunks(documents_path):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+    chunks = []
+    for name in sorted(os.listdir(documents_path)):
+        if name.endswith(".pdf"):
+            docs = splitter.split_documents(PyPDFLoader(os.path.join(documents_path, name)).load())
+            print(f"{name}: {len(docs)} chunks")
+            chunks.extend(doc.page_content for doc in docs)
+    return chunks
+
+
+def embedding_seconds_per_chunk(chunks):
+    try:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    except Exception as e:
+        print(f"embedding model unavailable ({type(e).__name__}); skipping ingestion time")
+        return None
+    start = time.perf_counter()
+    embeddings.embed_documents(chunks)
+    return (time.perf_counter() - start) / len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", default="documents")
+    parser.add_argument("--copies", type=int, default=1)
+    parser.add_argument("--threshold", type=float, default=Config.RAG_NEAR_DUP_THRESHOLD)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.documents) * args.copies
+    if not chunks:
+        print("no chunks to index")
+        return
+
+    index = NearDuplicateIndex(args.threshold)
+    kinds = {"exact": 0, "near": 0}
+    start = time.perf_counter()
+    for chunk in chunks:
+        match = index.add(chunk)
+        if match:
+            kinds[match[0]] += 1
+    dedup_seconds = time.perf_counter() - start
+
+    kept = len(index)
+    print(f"chunks: {len(chunks)} -> {kept} ({kinds['exact']} exact, {kinds['near']} near duplicates)")
+    print(f"index size: {len(chunks) * DIM * 4 / 1024:.1f} KiB -> {kept * DIM * 4 / 1024:.1f} KiB "
+          f"({1 - kept / len(chunks):.0%} smaller)")
+    print(f"dedup time: {dedup_seconds * 1e3:.1f} ms ({dedup_seconds / len(chunks) * 1e6:.0f} us/chunk)")
+
+    per_chunk = embedding_seconds_per_chunk(chunks)
+    if per_chunk is not None:
+        saved = per_chunk * (len(chunks) - kept)
+        print(f"embedding: {per_chunk * 1e3:.1f} ms/chunk, {saved:.2f} s saved, net {saved - dedup_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-assessment cost of metric recording.
+
+Replays the metric calls one /assess request makes (API counter, four agent
+counters and timers, five risk score observations) and reports the mean cost
+per assessment. Run with --multiprocess to measure the mmap-backed values used
+under several workers:
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --multiprocess
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+AGENTS = ("credit", "market", "operational", "compliance")
+LEVELS = ("low", "medium", "high", "critical")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--multiprocess", action="store_true", help="record into PROMETHEUS_MULTIPROC_DIR")
+    parser.add_argument("--number", type=int, default=20000, help="assessments per timing run")
+    args = parser.parse_args()
+
+    if args.multiprocess:
+        # must be set before prometheus_client creates any metric value
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prom-bench-")
+
+    from prometheus_client import CollectorRegistry, Gauge
+    from app.metrics import agent_requests, agent_response_time, api_requests, observe_risk_score
+
+    timers = {agent: agent_response_time.labels(agent_type=agent) for agent in AGENTS}
+    legacy_registry = CollectorRegistry()
+    legacy_gauge = Gauge("risk_score_current", "Current risk scores", ["risk_type"], registry=legacy_registry,
+                         multiprocess_mode="liveall")
+
+    def record_assessment(i=[0]):
+        i[0] += 1
+        level = LEVELS[i[0] % 4]
+        api_requests.labels(endpoint="/assess").inc()
+        for agent in AGENTS:
+            agent_requests.labels(agent_type=agent).inc()
+            timers[agent].observe(0.01)
+            observe_risk_score(agent, level, 0.42)
+        observe_risk_score("overall", level, 0.42)
+
+    def record_assessment_legacy():
+        api_requests.labels(endpoint="/assess").inc()
+        for agent in AGENTS:
+            agent_requests.labels(agent_type=agent).inc()
+            timers[agent].observe(0.01)
+            legacy_gauge.labels(risk_type=agent).set(0.42)
+        legacy_gauge.labels(risk_type="overall").set(0.42)
+
+    mode = "multiprocess" if args.multiprocess else "single-process"
+    for name, fn in (("histograms (current)", record_assessment), ("gauges (previous)", record_assessment_legacy)):
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        print(f"{mode:15s} {name:22s} {best / args.number * 1e6:8.2f} us/assessment")
+
+
+if __name__ == "__main__":
+    main()
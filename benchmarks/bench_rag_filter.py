@@ -0,0 +1,70 @@
+"""Latency of company-filtered retrieval as the corpus grows.
+
+Builds synthetic flat L2 indexes (384-dim, the MiniLM embedding size) with a
+fixed number of chunks per company. For each size it compares an unfiltered
+search, post-filtering a larger unfiltered result (what FAISS.similarity_search
+with filter= does), and filtered_search through the metadata index:
+
+    python -m benchmarks.bench_rag_filter --sizes 10000 100000 500000
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+import app.rag_pipeline as rag
+from app.rag_pipeline import MetadataIndex, filtered_search
+
+DIM = 384
+
+
+def time_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--chunks-per-company", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'unfiltered':>11} {'post-filter':>12} {'id selector':>12} {'exact scan':>11}  (ms/query)")
+    for size in args.sizes:
+        index = faiss.IndexFlatL2(DIM)
+        index.add(rng.standard_normal((size, DIM), dtype=np.float32))
+        metadata_index = MetadataIndex()
+        for faiss_id in range(size):
+            metadata_index.add(faiss_id, {"company_id": f"C{faiss_id // args.chunks_per_company}"})
+        company_ids = metadata_index.lookup({"company_id": "C7"})
+        company_set = set(company_ids.tolist())
+        query = rng.standard_normal((1, DIM), dtype=np.float32)
+
+        def post_filter(fetch_k=20 * args.k):
+            _, labels = index.search(query, fetch_k)
+            return [i for i in labels[0] if i in company_set][:args.k]
+
+        def selector():
+            saved, rag.EXACT_SCAN_MAX_IDS = rag.EXACT_SCAN_MAX_IDS, 0
+            try:
+                return filtered_search(index, query[0], args.k, company_ids)
+            finally:
+                rag.EXACT_SCAN_MAX_IDS = saved
+
+        unfiltered = time_ms(lambda: index.search(query, args.k), args.repeat)
+        post = time_ms(post_filter, args.repeat)
+        sel = time_ms(selector, args.repeat)
+        exact = time_ms(lambda: filtered_search(index, query[0], args.k, company_ids), args.repeat)
+        recall = len(post_filter()) / args.k
+        print(f"{size:>8} {unfiltered:>11.2f} {post:>12.2f} {sel:>12.2f} {exact:>11.3f}"
+              f"  post-filter filled {recall:.0%} of k")
+
+
+if __name__ == "__main__":
+    main()
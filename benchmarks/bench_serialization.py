@@ -0,0 +1,96 @@
+"""Serialization cost of assessment responses and stored records.
+
+Compares the previous path (response_model revalidation + stdlib JSON for
+responses, .dict() + full-store json.dump(indent=2) for storage) with the
+orjson/msgpack path:
+
+    python -m benchmarks.bench_serialization --store-size 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.mcp_server import MCPServer
+from app.models import ComprehensiveRiskAssessment, RiskScore, RiskLevel
+from app.serialization import FastJSONResponse, MsgpackResponse
+
+
+def make_assessment(i: int) -> ComprehensiveRiskAssessment:
+    scores = {
+        name: RiskScore(risk_type=name, score=0.42, level=RiskLevel.MEDIUM,
+                        factors=["Moderate debt-to-equity ratio", "Moderate liquidity"], confidence=0.85)
+        for name in ("credit", "market", "operational", "compliance")
+    }
+    return ComprehensiveRiskAssessment(
+        company_id=f"COMP{i % 50}",
+        credit_risk=scores["credit"], market_risk=scores["market"],
+        operational_risk=scores["operational"], compliance_risk=scores["compliance"],
+        overall_risk_score=0.42, overall_risk_level=RiskLevel.MEDIUM,
+        recommendations=["Monitor liquidity ratios closely and maintain adequate cash reserves"] * 3,
+        assessment_id=f"RA-{i:08d}",
+    )
+
+
+def previous_response(assessment):
+    validated = ComprehensiveRiskAssessment.model_validate(assessment.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def previous_log(store, assessment, path):
+    data = assessment.model_dump()
+    data["timestamp"] = data["timestamp"].isoformat()
+    store[assessment.assessment_id] = data
+    with open(path, "w") as f:
+        json.dump({"assessments": store}, f, indent=2, default=str)
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store-size", type=int, default=1000, help="assessments logged in the storage run")
+    parser.add_argument("--batch", type=int, default=100, help="assessments per batch response")
+    args = parser.parse_args()
+
+    assessment = make_assessment(0)
+    batch = {"assessments": [make_assessment(i) for i in range(args.batch)]}
+
+    print("response, single assessment")
+    print(f"  previous (revalidate + json)   {per_call_us(lambda: previous_response(assessment), 2000):9.1f} us")
+    print(f"  FastJSONResponse (orjson)      {per_call_us(lambda: FastJSONResponse(assessment), 2000):9.1f} us")
+    print(f"response, batch of {args.batch}")
+    print(f"  previous (revalidate + json)   "
+          f"{per_call_us(lambda: [previous_response(a) for a in batch['assessments']], 20):9.1f} us")
+    print(f"  FastJSONResponse (orjson)      {per_call_us(lambda: FastJSONResponse(batch), 20):9.1f} us")
+    print(f"  MsgpackResponse                {per_call_us(lambda: MsgpackResponse(batch), 20):9.1f} us")
+    print(f"  body size json/msgpack         {len(FastJSONResponse(batch).body)} / {len(MsgpackResponse(batch).body)} bytes")
+
+    assessments = [make_assessment(i) for i in range(args.store_size)]
+    print(f"storage, logging {args.store_size} assessments one at a time")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = {}
+        start = time.perf_counter()
+        for a in assessments:
+            previous_log(store, a, os.path.join(tmp, "previous.json"))
+        print(f"  previous (json.dump indent=2)  {time.perf_counter() - start:9.3f} s")
+
+        for name in ("assessments.json", "assessments.jsonl", "assessments.msgpack"):
+            server = MCPServer(os.path.join(tmp, name))
+            start = time.perf_counter()
+            for a in assessments:
+                asyncio.run(server.log_assessment(a))
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(os.path.join(tmp, name))
+            print(f"  MCPServer {name:20s} {elapsed:9.3f} s  {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
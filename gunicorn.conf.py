@@ -0,0 +1,7 @@
+# gunicorn.conf.py
+# Used by `gunicorn app.main:app -k uvicorn.workers.UvicornWorker` for multi-worker deployments
+from app.metrics import mark_worker_dead
+
+
+def child_exit(server, worker):
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,57 @@
+# tests/conftest.py
+import os
+import time
+import pytest
+
+class FakeLLM:
+    """Stands in for ChatGroq: sleeps for each scripted delay, optionally failing"""
+    def __init__(self, delays, fail=False):
+        self.delays = list(delays)
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, messages):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        time.sleep(delay)
+        if self.fail:
+            raise RuntimeError("provider error")
+        return f"answer after {delay}s"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def fake_llm():
+    """Factory: fake_llm(delays, fail=False)"""
+    return FakeLLM
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+@pytest.fixture
+def make_pipeline(tmp_path, monkeypatch):
+    """Factory: make_pipeline(filings) builds a RAGPipeline with fake embeddings whose PDF loader
+    serves {file name: [page text, ...]}"""
+    from langchain_community.embeddings import FakeEmbeddings
+    from langchain_core.documents import Document
+    import app.rag_pipeline as rag
+
+    def make(filings):
+        class FakeLoader:
+            def __init__(self, path):
+                self.name = os.path.basename(path)
+
+            def load(self):
+                return [Document(page_content=text, metadata={"page": i}) for i, text in enumerate(filings[self.name])]
+
+        monkeypatch.setattr(rag, "HuggingFaceEmbeddings", lambda model_name: FakeEmbeddings(size=32))
+        monkeypatch.setattr(rag, "PyPDFLoader", FakeLoader)
+        return rag.RAGPipeline(str(tmp_path / "vectors"), str(tmp_path / "documents"))
+    return make
+
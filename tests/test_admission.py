@@ -0,0 +1,156 @@
+# tests/test_admission.py
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from app.admission import AdmissionController, AdmissionRejected, Priority
+from app.agents import CreditRiskAgent
+from app.llm_guard import CircuitBreaker
+
+def _controller(**overrides):
+    settings = dict(max_concurrency=2, max_wait_seconds={Priority.INTERACTIVE: 0.3, Priority.BATCH: 1.0},
+                    rate_per_second=1000, burst=1000, initial_service_seconds=0.1)
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_overload_through_fake_llm_is_shed_with_retry_after(fake_llm):
+    controller = _controller()
+    agent = CreditRiskAgent(llm=fake_llm([0.1]), breaker=CircuitBreaker())
+    shed_before = sum(_sample("admission_shed_total", priority="interactive", reason=r)
+                      for r in ("queue_full", "queue_timeout"))
+
+    async def assess(i):
+        try:
+            async with controller.slot(f"client-{i}"):
+                await asyncio.to_thread(agent.analyze, {"financial_data": {}})
+            return 200
+        except AdmissionRejected as e:
+            assert e.retry_after >= 1
+            return e.status_code
+
+    async def spike():
+        return await asyncio.gather(*(assess(i) for i in range(30)))
+
+    statuses = asyncio.run(spike())
+    assert statuses.count(200) >= 2
+    assert statuses.count(503) > 0
+    assert set(statuses) <= {200, 503}
+    shed_after = sum(_sample("admission_shed_total", priority="interactive", reason=r)
+                     for r in ("queue_full", "queue_timeout"))
+    assert shed_after - shed_before == statuses.count(503)
+    assert _sample("admission_queue_depth", priority="interactive") == 0
+    assert controller._active == 0
+
+def test_token_bucket_rate_limits_per_client():
+    controller = _controller(rate_per_second=0.5, burst=2)
+
+    async def burst():
+        results = []
+        for client in ("a", "a", "a", "b"):
+            try:
+                async with controller.slot(client):
+                    results.append(200)
+            except AdmissionRejected as e:
+                results.append((e.status_code, e.retry_after))
+        return results
+
+    assert asyncio.run(burst()) == [200, 200, (429, 2), 200]
+
+def test_interactive_queue_is_served_before_batch():
+    controller = _controller(max_concurrency=1)
+    order = []
+
+    async def job(name, priority, delay=0.0):
+        await asyncio.sleep(delay)
+        async with controller.slot(name, priority):
+            order.append(name)
+            await asyncio.sleep(0.05)
+
+    async def run():
+        await asyncio.gather(job("first", Priority.BATCH), job("batch", Priority.BATCH, 0.01),
+                             job("interactive", Priority.INTERACTIVE, 0.02))
+
+    asyncio.run(run())
+    assert order == ["first", "interactive", "batch"]
+
+def test_batch_runs_each_item_in_its_own_slot():
+    controller = _controller(max_concurrency=3, rate_per_second=0.001, burst=25)
+    running, peak = 0, 0
+
+    async def assess():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    async def run():
+        results = await controller.run_all("client", Priority.BATCH, [assess] * 20)
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.run_all("client", Priority.BATCH, [assess] * 20)
+        return results, e.value.status_code
+
+    results, rejected = asyncio.run(run())
+    assert results == ["ok"] * 20
+    assert peak == 3
+    assert rejected == 429
+    assert controller._active == 0
+
+def test_batch_failure_cancels_remaining_items():
+    controller = _controller(max_concurrency=2)
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(1)
+        finished.append("slow")
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await controller.run_all("client", Priority.BATCH, [failing, slow, slow, slow])
+
+    asyncio.run(run())
+    assert finished == []
+    assert controller._active == 0
+    assert not any(controller._queues.values())
+
+def test_batch_is_charged_in_full_and_capped_at_burst():
+    controller = _controller(max_concurrency=8, rate_per_second=5, burst=20, initial_service_seconds=0.01)
+
+    async def assess():
+        return "ok"
+
+    async def attempt(size):
+        try:
+            await controller.run_all("client", Priority.BATCH, [assess] * size)
+            return 200, None
+        except AdmissionRejected as e:
+            return e.status_code, e.retry_after
+
+    async def run():
+        return [await attempt(21), await attempt(20), await attempt(20)]
+
+    too_large, full, rate_limited = asyncio.run(run())
+    assert too_large == (413, None)
+    assert full == (200, None)
+    # the second batch needs all 20 tokens back, not a burst-capped discount
+    assert rate_limited[0] == 429 and rate_limited[1] >= 3
+
+def test_batch_that_can_never_start_in_time_is_rejected_not_retried():
+    controller = _controller(max_concurrency=8, max_wait_seconds={Priority.INTERACTIVE: 2, Priority.BATCH: 30},
+                             rate_per_second=1000, burst=1000, initial_service_seconds=2)
+
+    async def assess():
+        return "ok"
+
+    with pytest.raises(AdmissionRejected) as e:
+        asyncio.run(controller.run_all("client", Priority.BATCH, [assess] * 200))
+    assert e.value.status_code == 413
+    assert e.value.retry_after is None
+    # rejected before any tokens were charged
+    assert "client" not in controller._buckets
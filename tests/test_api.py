@@ -40,3 +40,50 @@ def test_assess_endpoint():
     j = r.json()
     assert j["company_id"] == "testco"
     assert "assessment_id" in j
+
+def test_assess_batch_msgpack():
+    import msgpack
+    payload = {"requests": [
+        {"company_id": "co-a", "financial_data": {}},
+        {"company_id": "co-b", "financial_data": {}},
+    ]}
+    r = client.post("/assess/batch", json=payload, headers={"Accept": "application/msgpack"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/msgpack"
+    j = msgpack.unpackb(r.content)
+    assert [a["company_id"] for a in j["assessments"]] == ["co-a", "co-b"]
+
+def test_assess_batch_over_max_size_is_rejected():
+    from app.config import Config
+    payload = {"requests": [{"company_id": f"co-{i}", "financial_data": {}} for i in range(Config.MAX_BATCH_SIZE + 1)]}
+    r = client.post("/assess/batch", json=payload)
+    assert r.status_code == 422
+
+def test_stress_test_endpoint():
+    payload = {
+        "base": {"company_id": "testco", "financial_data": {"revenue_growth": 0.05, "interest_coverage": 2.5}},
+        "shocks": [{"field": "revenue_growth", "distribution": "normal", "value": -0.2, "std": 0.05}],
+        "n_scenarios": 1000,
+        "seed": 1,
+    }
+    r = client.post("/stress-test", json=payload)
+    assert r.status_code == 200
+    j = r.json()
+    assert j["n_scenarios"] == 1000
+    assert set(j["level_probabilities"]) == {"low", "medium", "high", "critical"}
+
+    payload["shocks"][0]["field"] = "not_a_field"
+    assert client.post("/stress-test", json=payload).status_code == 422
+
+def test_assess_rate_limited_with_retry_after(monkeypatch):
+    import app.main
+    from app.admission import AdmissionController, Priority
+    limited = AdmissionController(max_concurrency=4, max_wait_seconds={Priority.INTERACTIVE: 1, Priority.BATCH: 1},
+                                  rate_per_second=0.1, burst=1)
+    monkeypatch.setattr(app.main, "admission", limited)
+    payload = {"company_id": "testco", "financial_data": {}}
+    headers = {"X-Client-Id": "tenant-1"}
+    assert client.post("/assess", json=payload, headers=headers).status_code == 200
+    r = client.post("/assess", json=payload, headers=headers)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
@@ -0,0 +1,69 @@
+# tests/test_backtest.py
+import asyncio
+import pytest
+from app.backtest import iter_stored_assessments, run_backtest
+from app.mcp_server import MCPServer
+from app.models import ComprehensiveRiskAssessment, RiskAssessmentRequest, RiskScore, RiskLevel, ScoringConfig
+from app.serialization import convert_snapshot
+
+def _assessment(company_id, assessment_id):
+    score = RiskScore(risk_type="credit", score=0.1, level=RiskLevel.LOW, factors=[], confidence=0.9)
+    return ComprehensiveRiskAssessment(
+        company_id=company_id, credit_risk=score, market_risk=score, operational_risk=score,
+        compliance_risk=score, overall_risk_score=0.1, overall_risk_level=RiskLevel.LOW,
+        recommendations=[], assessment_id=assessment_id
+    )
+
+def _store(tmp_path):
+    server = MCPServer(str(tmp_path / "assessments.jsonl"))
+    requests = [
+        RiskAssessmentRequest(company_id=f"co-{i}", financial_data={
+            "debt_to_equity": 2.5 if i % 2 else 0.5, "current_ratio": 0.8, "interest_coverage": 1.2,
+            "revenue_growth": -0.2 if i % 3 == 0 else 0.1,
+        })
+        for i in range(30)
+    ]
+    asyncio.run(server.log_assessments([_assessment(r.company_id, f"RA-{i}") for i, r in enumerate(requests)],
+                                       requests))
+    # assessments logged before inputs were persisted cannot be replayed
+    asyncio.run(server.log_assessment(_assessment("legacy", "RA-legacy")))
+    return server.storage_file
+
+def test_backtest_reports_migrations_and_deltas(tmp_path):
+    store = _store(tmp_path)
+    candidate = ScoringConfig(thresholds={"low": 0.2, "medium": 0.4, "high": 0.85, "critical": 1.0})
+
+    report = run_backtest(iter_stored_assessments(store), candidate)
+
+    assert report["records"] == 30
+    assert report["skipped"] == 1
+    # thresholds alone never move scores
+    assert report["score_delta"]["overall"]["mean"] == 0
+    credit = report["migration"]["credit"]
+    assert sum(sum(row.values()) for row in credit.values()) == 30
+    assert credit["medium"]["high"] > 0
+    assert report["score_delta"]["credit"]["changed_level"] == 30 - sum(credit[l][l] for l in credit)
+
+def test_backtest_process_pool_matches_inline(tmp_path):
+    store = _store(tmp_path)
+    candidate = ScoringConfig(weights={"credit": 0.7, "market": 0.1, "operational": 0.1, "compliance": 0.1})
+
+    inline = run_backtest(iter_stored_assessments(store), candidate, batch_size=7)
+    pooled = run_backtest(iter_stored_assessments(store), candidate, workers=2, batch_size=7)
+
+    assert pooled["migration"] == inline["migration"]
+    assert pooled["score_delta"]["overall"]["mean"] > 0
+    assert abs(pooled["score_delta"]["overall"]["mean"] - inline["score_delta"]["overall"]["mean"]) < 1e-12
+
+def test_snapshot_store_is_refused_until_converted(tmp_path):
+    snapshot = MCPServer(str(tmp_path / "assessments.json"))
+    asyncio.run(snapshot.log_assessments([_assessment("co-1", "RA-1"), _assessment("co-2", "RA-2")],
+                                         [RiskAssessmentRequest(company_id=c, financial_data={}) for c in ("co-1", "co-2")]))
+    with pytest.raises(ValueError):
+        next(iter_stored_assessments(snapshot.storage_file))
+    assert len(list(iter_stored_assessments(snapshot.storage_file, allow_snapshot=True))) == 2
+
+    log = str(tmp_path / "assessments.jsonl")
+    assert convert_snapshot(snapshot.storage_file, log) == 2
+    assert [r["assessment_id"] for r in iter_stored_assessments(log)] == ["RA-1", "RA-2"]
+    assert MCPServer(log).company_map == snapshot.company_map
@@ -0,0 +1,92 @@
+# tests/test_dedup.py
+import numpy as np
+import app.rag_pipeline as rag
+from app.dedup import NearDuplicateIndex, drop_similar
+
+BOILERPLATE = ("This report contains forward-looking statements within the meaning of the Private Securities "
+               "Litigation Reform Act. Actual results may differ materially from those projected due to risks "
+               "including interest rate changes, credit losses, regulatory actions and market volatility. ")
+
+def test_exact_and_near_duplicates_are_detected():
+    index = NearDuplicateIndex(threshold=0.8)
+
+    assert index.add(BOILERPLATE * 3, item=0, partition="acme") is None
+    assert index.add("  " + (BOILERPLATE * 3).upper(), item=1, partition="acme") == ("exact", 0)
+    assert index.add(BOILERPLATE * 3 + "Page 14 of 96", item=2, partition="acme") == ("near", 0)
+    assert index.add("Revenue grew 12% year over year driven by commercial lending, while net interest "
+                     "margin compressed by 15 basis points as deposit costs rose across all segments.",
+                     item=3, partition="acme") is None
+    assert len(index) == 2
+
+def test_near_duplicates_only_match_within_partition():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(BOILERPLATE * 3, item=0, partition="acme")
+
+    # identical text is safe to share, a near copy may differ in what matters (e.g. the company name)
+    assert index.find(BOILERPLATE * 3, partition="globex") == ("exact", 0)
+    assert index.add(BOILERPLATE * 3 + "Page 14 of 96", item=1, partition="globex") is None
+    assert index.find(BOILERPLATE * 3 + "Page 15 of 96", partition="globex") == ("near", 1)
+
+def test_drop_similar_keeps_ranked_distinct_vectors():
+    rng = np.random.default_rng(0)
+    a, b, c = rng.standard_normal((3, 32))
+    vectors = np.stack([a, a * 2 + 1e-3, b, a, c])
+
+    assert drop_similar(vectors, k=5, cutoff=0.95) == [0, 2, 4]
+    assert drop_similar(vectors, k=2, cutoff=0.95) == [0, 2]
+    assert drop_similar(vectors, k=5, cutoff=1.01) == [0, 1, 2, 3, 4]
+
+FILINGS = {
+    "acme_10k.pdf": [BOILERPLATE * 3, "Acme revenue fell 8% on weaker industrial demand and inventory write-downs. " * 4],
+    "globex_10k.pdf": [BOILERPLATE * 3, "Globex grew deposits 11% while loan losses stayed below plan. " * 4],
+}
+
+def test_shared_boilerplate_stays_retrievable_per_company(make_pipeline):
+    rag_pipeline = make_pipeline(FILINGS)
+    rag_pipeline.add_documents(["docs/acme_10k.pdf", "docs/globex_10k.pdf"],
+                               {"acme_10k.pdf": {"company_id": "ACME"}, "globex_10k.pdf": {"company_id": "GLOBEX"}})
+
+    # placeholder + boilerplate once + one chunk of each company's own text
+    assert rag_pipeline.vector_store.index.ntotal == 4
+    acme = set(rag_pipeline.metadata_index.lookup({"company_id": "ACME"}).tolist())
+    globex = set(rag_pipeline.metadata_index.lookup({"company_id": "GLOBEX"}).tolist())
+    assert len(acme) == len(globex) == 2
+    assert len(acme & globex) == 1
+    assert len(rag_pipeline.metadata_index.lookup({"source_file": "globex_10k.pdf"})) == 2
+
+    # the folded tags live in the docstore, which save_local persists, so a reload rebuilds the same postings
+    rag_pipeline.metadata_index = rag.MetadataIndex()
+    rag_pipeline._index_documents(0)
+    assert rag_pipeline.metadata_index.lookup({"company_id": "GLOBEX"}).tolist() == sorted(globex)
+
+def test_reingesting_with_new_manifest_tags_existing_chunks(make_pipeline):
+    rag_pipeline = make_pipeline(FILINGS)
+    rag_pipeline.add_documents(["docs/acme_10k.pdf"])
+    assert not rag_pipeline.has_documents({"company_id": "ACME"})
+
+    rag_pipeline.add_documents(["docs/acme_10k.pdf"], {"acme_10k.pdf": {"company_id": "ACME", "fiscal_period": "FY2024"}})
+
+    assert rag_pipeline.vector_store.index.ntotal == 3
+    assert len(rag_pipeline.metadata_index.lookup({"company_id": "ACME", "fiscal_period": "FY2024"})) == 2
+
+
+def test_near_duplicates_across_fiscal_periods_are_kept(make_pipeline):
+    template = ("Net revenue for the fiscal year was REVENUE million, driven by commercial lending and treasury "
+                "services. Operating expenses were broadly flat as technology investment offset lower occupancy "
+                "costs, and the efficiency ratio improved for the third consecutive year. Credit quality remained "
+                "stable with net charge-offs in line with our through-the-cycle expectations, and the allowance "
+                "for credit losses was unchanged as a percentage of loans. Capital ratios stayed well above "
+                "regulatory minimums, supporting continued dividends and a measured share repurchase program.")
+    fy2023, fy2024 = template.replace("REVENUE", "412.6"), template.replace("REVENUE", "455.1")
+    rag_pipeline = make_pipeline({"acme_fy2023.pdf": [fy2023], "acme_fy2024.pdf": [fy2024]})
+    index = NearDuplicateIndex(rag.Config.RAG_NEAR_DUP_THRESHOLD)
+    index.add(fy2023)
+    assert index.find(fy2024) is not None, "the two years must be near duplicates for this test to matter"
+
+    rag_pipeline.add_documents(["docs/acme_fy2023.pdf", "docs/acme_fy2024.pdf"], {
+        "acme_fy2023.pdf": {"company_id": "ACME", "fiscal_period": "FY2023"},
+        "acme_fy2024.pdf": {"company_id": "ACME", "fiscal_period": "FY2024"},
+    })
+
+    assert rag_pipeline.query("revenue", filters={"company_id": "ACME", "fiscal_period": "FY2024"}) == fy2024
+    assert rag_pipeline.query("revenue", filters={"company_id": "ACME", "fiscal_period": "FY2023"}) == fy2023
@@ -0,0 +1,77 @@
+# tests/test_diagnostics.py
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langgraph.checkpoint.memory import MemorySaver
+from app.config import Config
+from app.diagnostics import create_router
+
+TOKEN = {"X-Admin-Token": "secret"}
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "DIAGNOSTICS_TOKEN", "secret")
+    orchestrator = SimpleNamespace(memory=MemorySaver())
+    orchestrator.memory.storage["thread-1"][""]["cp-1"] = object()
+    mcp_server = SimpleNamespace(assessments={"RA-1": {}, "RA-2": {}}, company_map={"acme": ["RA-1", "RA-2"]})
+    app = FastAPI()
+    app.include_router(create_router(orchestrator, mcp_server))
+    yield TestClient(app)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def _busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_requires_admin_token(client, monkeypatch):
+    assert client.get("/admin/diagnostics/objects").status_code == 403
+    assert client.get("/admin/diagnostics/objects", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    monkeypatch.setattr(Config, "DIAGNOSTICS_TOKEN", "")
+    assert client.get("/admin/diagnostics/objects", headers={"X-Admin-Token": ""}).status_code == 403
+
+def test_profile_captures_busy_thread(client):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,))
+    worker.start()
+    try:
+        folded = client.get("/admin/diagnostics/profile", params={"seconds": 0.3, "interval_ms": 5}, headers=TOKEN)
+        speedscope = client.get("/admin/diagnostics/profile",
+                                params={"seconds": 0.2, "interval_ms": 5, "format": "speedscope"}, headers=TOKEN)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert folded.status_code == 200
+    assert "_busy_worker (test_diagnostics.py)" in folded.text
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.text.strip().splitlines())
+    profile = speedscope.json()
+    names = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert "_busy_worker" in names
+    assert len(profile["profiles"][0]["samples"]) == len(profile["profiles"][0]["weights"])
+
+def test_tracemalloc_snapshot_and_diff(client):
+    assert client.get("/admin/diagnostics/tracemalloc/snapshot", headers=TOKEN).status_code == 409
+    assert client.post("/admin/diagnostics/tracemalloc/start", headers=TOKEN).json() == {"tracing": True}
+    assert client.get("/admin/diagnostics/tracemalloc/diff", headers=TOKEN).status_code == 409
+
+    assert client.get("/admin/diagnostics/tracemalloc/snapshot", headers=TOKEN).status_code == 200
+    leak = [bytearray(1024) for _ in range(2000)]
+    diff = client.get("/admin/diagnostics/tracemalloc/diff", params={"limit": 5}, headers=TOKEN).json()
+
+    assert any("test_diagnostics.py" in site["site"] and site["size_diff_kib"] >= 2000 for site in diff["top"])
+    assert client.post("/admin/diagnostics/tracemalloc/stop", headers=TOKEN).json() == {"tracing": False}
+    del leak
+
+def test_object_counts(client):
+    counts = client.get("/admin/diagnostics/objects", params={"top_types": 5}, headers=TOKEN).json()
+
+    assert counts["orchestrator_memory"]["threads"] == 1
+    assert counts["orchestrator_memory"]["checkpoints"] == 1
+    assert counts["mcp_server"] == {"assessments": 2, "companies": 1, "company_map_entries": 2}
+    assert "rag_pipeline" not in counts
+    assert len(counts["gc"]["top_types"]) == 5
@@ -0,0 +1,54 @@
+# tests/test_llm_guard.py
+import time
+import pytest
+from app.agents import CreditRiskAgent
+from app.llm_guard import BreakerState, CircuitBreaker, LLMGuard, LLMUnavailable
+
+def test_guard_times_out_slow_llm_within_budget(fake_llm):
+    guard = LLMGuard(fake_llm([1.0]), CircuitBreaker(), budget_seconds=0.05)
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        guard.invoke([])
+    assert time.monotonic() - start < 0.5
+
+def test_guard_hedges_slow_call(fake_llm):
+    llm = fake_llm([1.0, 0.01])
+    guard = LLMGuard(llm, CircuitBreaker(), budget_seconds=0.5, hedge_after_seconds=0.02)
+    assert guard.invoke([]) == "answer after 0.01s"
+    assert llm.calls == 2
+
+def test_breaker_trips_on_errors_and_recovers_through_half_open(fake_llm, fake_clock):
+    breaker = CircuitBreaker(window=10, min_calls=4, error_rate_threshold=0.5, open_seconds=30,
+                             half_open_probes=2, clock=fake_clock)
+    failing = LLMGuard(fake_llm([0], fail=True), breaker, budget_seconds=1)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            failing.invoke([])
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(LLMUnavailable):
+        failing.invoke([])
+
+    fake_clock.now += 30
+    assert breaker.state == BreakerState.HALF_OPEN
+    healthy = LLMGuard(fake_llm([0]), breaker, budget_seconds=1)
+    healthy.invoke([])
+    healthy.invoke([])
+    assert breaker.state == BreakerState.CLOSED
+
+def test_breaker_trips_on_p95_latency():
+    breaker = CircuitBreaker(window=10, min_calls=5, p95_threshold_seconds=2.0)
+    for _ in range(5):
+        breaker.record(True, 3.0)
+    assert breaker.state == BreakerState.OPEN
+
+def test_credit_agent_degrades_to_rule_only_score(fake_llm):
+    state = {"financial_data": {"debt_to_equity": 1.5}, "llm_deadline": time.monotonic() + 0.05}
+    slow = CreditRiskAgent(llm=fake_llm([1.0]), breaker=CircuitBreaker())
+    degraded = slow.analyze(state)
+    assert not degraded.llm_contributed
+    assert degraded.score == pytest.approx(0.5)
+
+    fast = CreditRiskAgent(llm=fake_llm([0]), breaker=CircuitBreaker())
+    enriched = fast.analyze({**state, "llm_deadline": time.monotonic() + 1})
+    assert enriched.llm_contributed
+    assert enriched.score == pytest.approx(0.5 * 1.1)
@@ -0,0 +1,47 @@
+# tests/test_metrics.py
+import os
+import subprocess
+import sys
+from prometheus_client import REGISTRY
+from app.metrics import observe_risk_score
+from app.models import RiskLevel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _count(risk_type, risk_level):
+    value = REGISTRY.get_sample_value("risk_score_count", {"risk_type": risk_type, "risk_level": risk_level})
+    return value or 0.0
+
+def test_observe_risk_score_labels_by_type_and_level():
+    before = _count("credit", "high")
+    observe_risk_score("credit", RiskLevel.HIGH, 0.7)
+    observe_risk_score("credit", "high", 0.8)
+    assert _count("credit", "high") == before + 2
+
+def test_multiprocess_render_aggregates_workers(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    worker = "from app.metrics import observe_risk_score; observe_risk_score('market', 'low', 0.1)"
+    for _ in range(3):
+        subprocess.run([sys.executable, "-c", worker], env=env, cwd=ROOT, check=True)
+
+    render = "import sys; from app.metrics import render_latest; sys.stdout.write(render_latest().decode())"
+    out = subprocess.run([sys.executable, "-c", render], env=env, cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    assert 'risk_score_count{risk_level="low",risk_type="market"} 3.0' in out
+
+def test_dead_worker_live_gauges_are_dropped(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    worker = "import os; from app.metrics import admission_in_flight; admission_in_flight.inc(); print(os.getpid())"
+    pid = subprocess.run([sys.executable, "-c", worker], env=env, cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout.strip()
+    render = "import sys; from app.metrics import render_latest; sys.stdout.write(render_latest().decode())"
+
+    def in_flight():
+        out = subprocess.run([sys.executable, "-c", render], env=env, cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        return [line for line in out.splitlines() if line.startswith("admission_in_flight ")]
+
+    assert in_flight() == ["admission_in_flight 1.0"]
+    subprocess.run([sys.executable, "-c", f"from app.metrics import mark_worker_dead; mark_worker_dead({pid})"],
+                   env=env, cwd=ROOT, check=True)
+    assert in_flight() in ([], ["admission_in_flight 0.0"])
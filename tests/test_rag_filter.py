@@ -0,0 +1,78 @@
+# tests/test_rag_filter.py
+from types import SimpleNamespace
+import faiss
+import numpy as np
+import pytest
+import app.rag_pipeline as rag
+from app.config import Config
+from app.orchestrator import RiskAssessmentOrchestrator
+from app.rag_pipeline import MetadataIndex, filtered_search
+
+def test_metadata_index_intersects_filters():
+    index = MetadataIndex()
+    index.add(0, {"company_id": "acme", "document_type": "10-K", "fiscal_period": "FY2023"})
+    index.add(1, {"company_id": "acme", "document_type": "10-Q"})
+    index.add(2, {"company_id": "globex", "document_type": "10-K"})
+
+    assert index.lookup({"company_id": "acme"}).tolist() == [0, 1]
+    assert index.lookup({"company_id": "acme", "document_type": "10-K"}).tolist() == [0]
+    assert index.lookup({"company_id": "initech"}).tolist() == []
+
+@pytest.mark.parametrize("exact_scan_max", [0, rag.EXACT_SCAN_MAX_IDS])
+@pytest.mark.parametrize("index_cls", [faiss.IndexFlatL2, faiss.IndexFlatIP])
+def test_filtered_search_only_returns_subset(monkeypatch, exact_scan_max, index_cls):
+    monkeypatch.setattr(rag, "EXACT_SCAN_MAX_IDS", exact_scan_max)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 16)).astype(np.float32)
+    index = index_cls(16)
+    index.add(vectors)
+    ids = np.arange(100, 300, dtype=np.int64)
+    query = rng.standard_normal(16).astype(np.float32)
+
+    hits = filtered_search(index, query, 5, ids)
+
+    if index_cls is faiss.IndexFlatIP:
+        expected = ids[np.argsort(-(vectors[ids] @ query))[:5]]
+    else:
+        expected = ids[np.argsort(((vectors[ids] - query) ** 2).sum(axis=1))[:5]]
+    assert [i for i, _ in hits] == expected.tolist()
+    assert filtered_search(index, query, 5, np.empty(0, dtype=np.int64)) == []
+
+FILINGS = {
+    "acme_10k.pdf": ["Acme revenue fell 8% on weaker industrial demand and inventory write-downs."],
+    "globex_10k.pdf": ["Globex grew deposits 11% while loan losses stayed below plan."],
+    "sector_outlook.pdf": ["Regional banks face tighter liquidity as deposit betas rise across the sector."],
+}
+MANIFEST = {"acme_10k.pdf": {"company_id": "ACME"}, "globex_10k.pdf": {"company_id": "GLOBEX"}}
+
+def _retrieve(rag_pipeline, company_id):
+    return RiskAssessmentOrchestrator.rag_retrieval_node(SimpleNamespace(rag_pipeline=rag_pipeline),
+                                                         {"company_id": company_id})["rag_context"]
+
+def test_query_with_filters_returns_only_that_company(make_pipeline):
+    rag_pipeline = make_pipeline(FILINGS)
+    rag_pipeline.add_documents([f"docs/{name}" for name in FILINGS], MANIFEST)
+
+    assert rag_pipeline.query("revenue and deposits", k=5, filters={"company_id": "ACME"}) == FILINGS["acme_10k.pdf"][0]
+    assert _retrieve(rag_pipeline, "GLOBEX") == FILINGS["globex_10k.pdf"][0]
+
+def test_company_without_filings_only_falls_back_to_untagged(make_pipeline, monkeypatch):
+    rag_pipeline = make_pipeline(FILINGS)
+    rag_pipeline.add_documents([f"docs/{name}" for name in FILINGS], MANIFEST)
+
+    context = _retrieve(rag_pipeline, "INITECH")
+    assert FILINGS["sector_outlook.pdf"][0] in context
+    assert "Acme" not in context and "Globex" not in context
+
+    monkeypatch.setattr(Config, "RAG_FALLBACK_UNTAGGED", False)
+    assert _retrieve(rag_pipeline, "INITECH") == ""
+
+def test_untagged_lookup_excludes_rows_tagged_through_aliases():
+    index = MetadataIndex()
+    index.add(0, {"source_file": "a.pdf"})
+    index.add(1, {"source_file": "b.pdf", "company_id": "acme"})
+    index.add(0, {"company_id": "globex"})
+
+    assert index.lookup({"company_id": None}).tolist() == []
+    assert index.lookup({"document_type": None}).tolist() == [0, 1]
+    assert len(index) == 6
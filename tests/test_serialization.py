@@ -0,0 +1,40 @@
+# tests/test_serialization.py
+import asyncio
+import msgpack
+import orjson
+import pytest
+from app.mcp_server import MCPServer
+from app.models import ComprehensiveRiskAssessment, RiskScore, RiskLevel
+from app.serialization import FastJSONResponse, MsgpackResponse
+
+def _assessment(company_id="testco", assessment_id="RA-TEST"):
+    scores = {
+        name: RiskScore(risk_type=name, score=0.2, level=RiskLevel.LOW, factors=["f"], confidence=0.8)
+        for name in ("credit", "market", "operational", "compliance")
+    }
+    return ComprehensiveRiskAssessment(
+        company_id=company_id,
+        credit_risk=scores["credit"], market_risk=scores["market"],
+        operational_risk=scores["operational"], compliance_risk=scores["compliance"],
+        overall_risk_score=0.2, overall_risk_level=RiskLevel.LOW,
+        recommendations=["r"], assessment_id=assessment_id
+    )
+
+def test_responses_match_pydantic_json():
+    assessment = _assessment()
+    expected = orjson.loads(assessment.model_dump_json())
+    assert orjson.loads(FastJSONResponse(assessment).body) == expected
+    assert msgpack.unpackb(MsgpackResponse({"assessments": [assessment]}).body) == {"assessments": [expected]}
+
+@pytest.mark.parametrize("filename", ["assessments.json", "assessments.jsonl", "assessments.msgpack"])
+def test_store_round_trip(tmp_path, filename):
+    path = str(tmp_path / filename)
+    server = MCPServer(path)
+    asyncio.run(server.log_assessment(_assessment("a", "RA-1")))
+    asyncio.run(server.log_assessments([_assessment("a", "RA-2"), _assessment("b", "RA-3")]))
+
+    reloaded = MCPServer(path)
+    assert reloaded.company_map == {"a": ["RA-2", "RA-1"], "b": ["RA-3"]}
+    history = asyncio.run(reloaded.get_assessment_history("a"))
+    assert [h["assessment_id"] for h in history] == ["RA-2", "RA-1"]
+    assert history[0]["overall_risk_level"] == "low"
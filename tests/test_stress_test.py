@@ -0,0 +1,73 @@
+# tests/test_stress_test.py
+import numpy as np
+import pytest
+from app.models import RiskAssessmentRequest, StressShock, StressTestRequest
+from app.scoring import RISK_RULES, RISK_TYPES, score_rules, overall_score
+from app.stress_test import base_columns, score_columns, run_stress_test
+
+BASE = RiskAssessmentRequest(
+    company_id="COMP123",
+    financial_data={
+        "debt_to_equity": 1.5, "current_ratio": 1.2, "interest_coverage": 2.5, "revenue_growth": 0.05,
+        "foreign_currency_exposure": 0.2, "commodity_exposure": 0.1, "system_downtime_hours": 20,
+        "employee_turnover_rate": 0.1, "process_error_rate": 0.01, "top_supplier_concentration": 0.2,
+        "security_incidents_year": 1, "regulatory_violations_year": 0, "compliance_audit_findings": 2,
+        "sox_compliant": False, "gdpr_compliant": True, "pending_litigation": 0,
+    },
+    market_data={"volatility": 0.2, "beta": 1.1},
+    compliance_requirements=["SOX", "GDPR"],
+)
+
+def test_vectorized_scores_match_agent_rules():
+    rng = np.random.default_rng(0)
+    columns = base_columns(BASE)
+    columns["revenue_growth"] = rng.uniform(-0.3, 0.2, 200)
+    columns["interest_coverage"] = rng.uniform(0.5, 4, 200)
+    columns["foreign_currency_exposure"] = rng.uniform(0, 0.8, 200)
+    scores = score_columns(columns, 200, BASE.compliance_requirements)
+
+    for i in range(200):
+        financial_data = {**BASE.financial_data, "revenue_growth": columns["revenue_growth"][i],
+                          "interest_coverage": columns["interest_coverage"][i],
+                          "foreign_currency_exposure": columns["foreign_currency_exposure"][i]}
+        expected = {
+            risk_type: score_rules(RISK_RULES[risk_type], financial_data, BASE.market_data,
+                                   BASE.compliance_requirements)[0]
+            for risk_type in RISK_TYPES
+        }
+        for risk_type in RISK_TYPES:
+            assert scores[risk_type][i] == pytest.approx(expected[risk_type])
+        assert scores["overall"][i] == pytest.approx(overall_score(expected))
+
+def test_monte_carlo_and_grid_shocks():
+    request = StressTestRequest(
+        base=BASE,
+        shocks=[
+            StressShock(field="revenue_growth", kind="add", distribution="normal", value=-0.2, std=0.05),
+            StressShock(field="interest_coverage", kind="multiply", distribution="grid", values=[1.0, 0.5]),
+            StressShock(field="foreign_currency_exposure", kind="multiply", value=1.3),
+        ],
+        n_scenarios=20000,
+        seed=7,
+    )
+    result = run_stress_test(request)
+
+    assert result.n_scenarios == 40000
+    assert sum(result.level_probabilities.values()) == pytest.approx(1.0)
+    assert [g.grid_point for g in result.grid] == [{"interest_coverage": 1.0}, {"interest_coverage": 0.5}]
+    # halving interest coverage can only raise the credit score
+    assert result.grid[1].overall_risk_score.mean > result.grid[0].overall_risk_score.mean
+    assert result.overall_risk_score.mean > result.base_overall_risk_score
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        run_stress_test(StressTestRequest(base=BASE, shocks=[StressShock(field="ebitda", value=1)]))
+
+def test_repeated_requirement_counts_each_time():
+    financial_data = {"sox_compliant": False}
+    score, factors = score_rules(RISK_RULES["compliance"], financial_data, compliance_requirements=["SOX", "SOX"])
+    assert score == pytest.approx(0.4)
+    assert factors == ["SOX compliance issues"] * 2
+    vectorized = score_columns(base_columns(RiskAssessmentRequest(
+        company_id="C", financial_data=financial_data, compliance_requirements=["SOX", "SOX"])), 1, ["SOX", "SOX"])
+    assert vectorized["compliance"][0] == pytest.approx(0.4)